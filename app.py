@@ -2,12 +2,14 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_login import LoginManager # <-- NEW: Import LoginManager
 from config import Config
-from models import db, User # <-- Ensure User model is imported for user_loader
-from routes import routes_bp
-from realtime import socketio
+from models import db, User, Order # <-- Ensure User model is imported for user_loader
+from routes import routes_bp, event_bus
+from realtime import socketio, init_socketio
 from scheduler import start_scheduler
 from extra_routes import extra_bp
-from market_snapshot import market_bp, socketio, start_market_thread
+from gemini_client import start_summary_refresher
+from order_ingest import order_ingestor
+from market_snapshot import market_bp, start_market_thread
 
 
 login_manager = LoginManager()
@@ -42,9 +44,22 @@ def create_app():
     app.register_blueprint(routes_bp)
     app.register_blueprint(extra_bp)
     app.register_blueprint(market_bp) 
-    socketio.init_app(app, cors_allowed_origins="*")
+    init_socketio(app)
 
+    if Config.ORDER_BOOK_ENABLED:
+        if Config.WEB_WORKERS > 1:
+            # Each worker would match against its own books and notify only its
+            # own clients; refuse rather than silently split the market
+            raise RuntimeError("The order book runs in a single process: set WEB_WORKERS=1, "
+                               "or ORDER_BOOK_ENABLED=0 to run several workers without it")
+        with app.app_context():
+            # Books are in memory only, so orders resting at the last shutdown are gone
+            Order.query.filter_by(status="open").update({"status": "expired"})
+            db.session.commit()
+        order_ingestor.start(app)
+        event_bus.start()
     start_market_thread()
+    start_summary_refresher()
     return app
 
 if __name__ == "__main__":
@@ -0,0 +1,242 @@
+# bar_store.py
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from ohlcv_cache import _is_intraday
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# One fixed-width record per bar; files are raw arrays of these, append-only
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),  # bar start, ns since epoch (tz-naive)
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+# Corporate actions reported alongside the bars; one in the new tail means
+# the source re-adjusted every earlier price
+ACTION_COLUMNS = ("Stock Splits", "Dividends")
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive, blocking OS lock on `path`, shared by every process on the host."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        os.close(fd)  # closing releases the lock
+
+
+def _has_corporate_action(df, after_ts):
+    """True if a bar newer than `after_ts` carries a split or dividend."""
+    columns = [c for c in ACTION_COLUMNS if c in df.columns]
+    if not columns:
+        return False
+    ts = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+    actions = df[columns].to_numpy(dtype="f8")[ts > after_ts]
+    return bool(np.nan_to_num(actions).any())
+
+
+def yfinance_range_fetcher(symbol, interval, start=None, period=None):
+    """
+    Default source: bars from `start` (inclusive) to now, or the last
+    `period` when backfilling. Intraday bars keep their exchange timezone.
+    """
+    import yfinance as yf
+    ticker = yf.Ticker(symbol)
+    # Adjusted prices, with the Dividends / Stock Splits columns BarStore watches
+    if start is not None:
+        df = ticker.history(start=start, interval=interval, auto_adjust=True, actions=True)
+    else:
+        df = ticker.history(period=period, interval=interval, auto_adjust=True, actions=True)
+    if not _is_intraday(interval) and getattr(df.index, "tz", None) is not None:
+        df.index = df.index.tz_localize(None)
+    return df
+
+
+def yfinance_batch_range_fetcher(symbols, interval, start=None, period=None):
+    """
+    Batched yfinance_range_fetcher: one yf.download call for all symbols.
+    Returns {symbol: frame}.
+    """
+    import yfinance as yf
+    df = yf.download(list(symbols), start=start, period=None if start is not None else period,
+                     interval=interval, group_by="ticker", auto_adjust=True, progress=False, threads=True)
+    frames = {}
+    for symbol in symbols:
+        if isinstance(df.columns, pd.MultiIndex):
+            if symbol not in df.columns.get_level_values(0):
+                continue
+            frame = df[symbol].dropna(how="all")
+        else:
+            frame = df
+        if not _is_intraday(interval) and getattr(frame.index, "tz", None) is not None:
+            frame.index = frame.index.tz_localize(None)
+        frames[symbol] = frame
+    return frames
+
+
+def _period_start(period, end):
+    """Translate a yfinance-style period ("5d", "6mo", "2y", "max") to a start timestamp."""
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=end.year, month=1, day=1)
+    for suffix, unit in (("mo", "months"), ("d", "days"), ("y", "years")):
+        if period.endswith(suffix):
+            return end - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class BarStore:
+    """
+    Local columnar bar store: one memory-mapped file of BAR_DTYPE records per
+    (symbol, interval).
+
+    The first read of a symbol backfills `backfill_period` of bars. After
+    that, reads only fetch the missing tail, at most once every
+    `sync_interval` seconds. The last stored bar is rewritten when the source
+    revises it, for example today's partial daily bar.
+
+    Bars are split- and dividend-adjusted, so when the fetched tail reports a
+    split or dividend the file is rebuilt from a fresh backfill rather than
+    appending bars on a new basis to old ones.
+
+    Syncs of different symbols run concurrently. Writes to a file happen
+    under an OS lock, and the last stored bar is re-read under that lock, so
+    several processes syncing the same symbol never duplicate bars.
+    """
+
+    def __init__(self, root, fetcher=yfinance_range_fetcher, backfill_period="5y", sync_interval=300):
+        self.root = root
+        self.fetcher = fetcher
+        self.backfill_period = backfill_period
+        self.sync_interval = sync_interval
+        self._synced_at = {}  # (symbol, interval) -> monotonic time of last sync
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, interval, f"{symbol}.bars")
+
+    def read(self, symbol, interval="1d"):
+        """
+        Zero-copy, read-only view of every stored bar for the symbol.
+        """
+        path = self._path(symbol.upper(), interval)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r")
+
+    def sync(self, symbol, interval="1d", force=False):
+        """
+        Bring the stored bars up to date, fetching only what is missing.
+        """
+        symbol = symbol.upper()
+        key = (symbol, interval)
+        with self._key_lock(key):
+            synced_at = self._synced_at.get(key)
+            if not force and synced_at is not None and time.monotonic() - synced_at < self.sync_interval:
+                return
+
+            last_ts = self._last_ts(symbol, interval)
+            rebuild = last_ts is None
+            if last_ts is not None:
+                start = pd.Timestamp(last_ts).strftime("%Y-%m-%d")
+                df = self.fetcher(symbol, interval, start=start)
+                if df is not None and _has_corporate_action(df, last_ts):
+                    print(f"Split or dividend in {symbol} {interval} bars; rebuilding adjusted history")
+                    rebuild = True
+            if rebuild:
+                df = self.fetcher(symbol, interval, period=self.backfill_period)
+
+            if df is not None and not df.empty:
+                records = self._to_records(df)
+                with _file_lock(self._path(symbol, interval) + ".lock"):
+                    if rebuild and last_ts is not None:
+                        self._replace(symbol, interval, records)
+                    else:
+                        self._append(symbol, interval, records)
+            self._synced_at[key] = time.monotonic()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _last_ts(self, symbol, interval):
+        bars = self.read(symbol, interval)
+        return int(bars["ts"][-1]) if len(bars) else None
+
+    def _to_records(self, df):
+        records = np.empty(len(df), dtype=BAR_DTYPE)
+        records["ts"] = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+        for field, column in COLUMNS.items():
+            records[field] = df[column].to_numpy(dtype="f8")
+        return records
+
+    def _append(self, symbol, interval, records):
+        # Caller holds the file lock; another process may have appended since we fetched
+        path = self._path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        last_ts = self._last_ts(symbol, interval)
+        if last_ts is not None:
+            revised = records[records["ts"] == last_ts]
+            if len(revised):
+                stored = np.memmap(path, dtype=BAR_DTYPE, mode="r+")
+                stored[-1] = revised[-1]
+                stored.flush()
+                del stored
+            records = records[records["ts"] > last_ts]
+        if len(records):
+            with open(path, "ab") as f:
+                f.write(records.tobytes())
+
+    def _replace(self, symbol, interval, records):
+        # Caller holds the file lock. Readers keep mapping the old file until they reopen
+        path = self._path(symbol, interval)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(records.tobytes())
+        os.replace(tmp, path)
+
+    def get_history(self, symbol, period="2y", interval="1d"):
+        """
+        OHLCV frame for the last `period`, indexed by Date, read from the
+        local store after syncing its tail.
+        """
+        self.sync(symbol, interval)
+        bars = self.read(symbol, interval)
+        if len(bars):
+            end = pd.Timestamp(int(bars["ts"][-1]))
+            start = _period_start(period, end)
+            if start is not None:
+                bars = bars[np.searchsorted(bars["ts"], start.value, side="left"):]
+
+        df = pd.DataFrame({column: np.asarray(bars[field]) for field, column in COLUMNS.items()},
+                          index=pd.DatetimeIndex(np.asarray(bars["ts"]).view("M8[ns]"), name="Date"))
+        return df
+
+
+bar_store = BarStore(Config.BAR_STORE_DIR, backfill_period=Config.BAR_STORE_BACKFILL,
+                     sync_interval=Config.BAR_STORE_SYNC_SECONDS)
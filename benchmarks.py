@@ -0,0 +1,473 @@
+# benchmarks.py
+import os
+import sys
+import json
+import math
+import tempfile
+import subprocess
+import time
+import random
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from order_book import OrderBook, RBTree, SegmentTree
+from matching_engine import MatchingEngine
+from simulation import monte_carlo_gbm, simulate_final_prices
+from http_client import HttpClient
+from gemini_client import generate_content, stream_content
+from models import db, Order, Trade
+from order_ingest import OrderIngestor
+from event_bus import EventBus
+
+
+def bench_order_book(levels, orders=5000):
+    """
+    Rest `levels` ask levels, then time `orders` rounds of an aggressive
+    buy that walks a couple of levels plus a sell that rests one back.
+    Returns orders per second, counting both orders of each round.
+    """
+    book = OrderBook()
+    for i in range(levels):
+        book.insert_order("sell", 100.0 + i * 0.01, 1.0)
+
+    placed = 0
+    start = time.perf_counter()
+    for _ in range(orders):
+        best = book.get_best_ask()
+        if best is None:
+            break
+        book.insert_order("buy", best["price"] + 0.01, 1.5)
+        book.insert_order("sell", best["price"] + 0.01, 0.5)
+        placed += 2
+    elapsed = time.perf_counter() - start
+    return placed / elapsed
+
+
+def run_order_book():
+    for levels in (10_000, 100_000, 1_000_000):
+        rate = bench_order_book(levels)
+        print(f"order_book  levels={levels:>9,}  {rate:>12,.0f} orders/sec")
+
+
+def bench_matching_engine(n_symbols, orders=50000, clients=16):
+    """
+    Fire `orders` random limit orders spread over `n_symbols` books from
+    `clients` request threads. Returns orders per second.
+    """
+    engine = MatchingEngine()
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    rng = random.Random(0)
+    batch = [(rng.choice(symbols), rng.choice(("buy", "sell")),
+              round(rng.uniform(95, 105), 2), rng.randint(1, 10)) for _ in range(orders)]
+
+    def place(order):
+        symbol, side, price, qty = order
+        return engine.insert_order(symbol, side, price, qty)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(place, batch))
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+    return orders / elapsed
+
+
+def run_matching_engine():
+    for n_symbols in (1, 8, 64):
+        rate = bench_matching_engine(n_symbols)
+        print(f"matching    symbols={n_symbols:>3}  {rate:>12,.0f} orders/sec")
+
+
+class _DictNode:
+    # Shape of the pre-__slots__ RBNode, kept as a memory baseline
+    def __init__(self, key, value, color="red", parent=None):
+        self.key = key
+        self.value = value
+        self.color = color
+        self.parent = parent
+        self.left = None
+        self.right = None
+
+
+def _traced_bytes(build, n):
+    tracemalloc.start()
+    obj = build(n)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return used / n
+
+
+def _build_tree(n):
+    tree = RBTree()
+    for i in range(n):
+        tree.insert(100.0 + i * 0.01, 1.0)
+    return tree
+
+
+def _build_book(n):
+    book = OrderBook()
+    for i in range(n):
+        book.insert_order("sell", 100.0 + i * 0.01, 1.0, order_id=i)
+    return book
+
+
+def run_memory(n=1_000_000):
+    rows = [
+        ("dict node", lambda n: [_DictNode(100.0 + i * 0.01, 1.0) for i in range(n)]),
+        ("RBTree", _build_tree),
+        ("OrderBook", _build_book),
+        ("SegmentTree", lambda n: SegmentTree([float(i) for i in range(n)])),
+    ]
+    for name, build in rows:
+        print(f"memory      {name:<12} {_traced_bytes(build, n):>8.1f} bytes/level  (n={n:,})")
+
+
+def _loop_gbm(initial_price, n_simulations, days, mu=0.0005, sigma=0.01):
+    # The original per-step Python loop, kept as the speedup baseline
+    sims = []
+    drift = mu - 0.5 * sigma * sigma
+    for _ in range(n_simulations):
+        path = [initial_price]
+        for _ in range(days):
+            path.append(path[-1] * math.exp(drift + sigma * random.gauss(0, 1)))
+        sims.append(path)
+    return sims
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def run_simulation():
+    for sims, days in ((500, 30), (10_000, 252)):
+        loop = _timed(_loop_gbm, 100.0, sims, days)
+        paths = _timed(monte_carlo_gbm, 100.0, sims, days)
+        finals = _timed(simulate_final_prices, 100.0, sims, days)
+        print(f"gbm         {sims:>9,} x {days:<4} loop {loop:8.3f}s  paths {paths:8.4f}s "
+              f"({loop / paths:6.0f}x)  finals {finals:8.4f}s ({loop / finals:6.0f}x)")
+    elapsed = _timed(simulate_final_prices, 100.0, 1_000_000, 252, dtype="float32")
+    print(f"gbm         1,000,000 x 252  finals float32 {elapsed:8.3f}s")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # Local stand-in for an upstream API: small JSON body after a fixed delay
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    delay = 0.02
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = b'{"c": 123.45}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def stub_server():
+    """Start a local stub HTTP server on a free port; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_http_client(calls=100):
+    server, url = stub_server()
+    client = HttpClient()
+    try:
+        fresh = _timed(lambda: [requests.get(url, timeout=5).json() for _ in range(calls)])
+        pooled = _timed(lambda: [client.get(url).json() for _ in range(calls)])
+        fanout = _timed(lambda: [f.result().json() for f in [client.submit("GET", url) for _ in range(calls)]])
+        print(f"http        {calls} calls  fresh {fresh:6.3f}s  pooled {pooled:6.3f}s  "
+              f"fan-out {fanout:6.3f}s (per-host limit {client.per_host_limit})")
+    finally:
+        server.shutdown()
+
+
+class _FakeGeminiHandler(BaseHTTPRequestHandler):
+    # Local stand-in for Gemini: generateContent answers after the whole
+    # reply is "generated"; streamGenerateContent sends each chunk as an SSE
+    # event as soon as it is ready
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    chunks = [f"chunk {i} " for i in range(20)]
+    chunk_delay = 0.02
+
+    def _payload(self, text):
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if ":streamGenerateContent" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for text in self.chunks:
+                time.sleep(self.chunk_delay)
+                event = f"data: {json.dumps(self._payload(text))}\r\n\r\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(self.chunk_delay * len(self.chunks))
+            body = json.dumps(self._payload("".join(self.chunks))).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def fake_gemini_server():
+    """Start a local fake Gemini API on a free port; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1beta"
+
+
+def run_gemini_stream():
+    server, base_url = fake_gemini_server()
+    try:
+        start = time.perf_counter()
+        full = generate_content("hello", base_url=base_url)
+        blocking = time.perf_counter() - start
+
+        start = time.perf_counter()
+        first = None
+        chunks = []
+        for text in stream_content("hello", base_url=base_url):
+            if first is None:
+                first = time.perf_counter() - start
+            chunks.append(text)
+        streamed = time.perf_counter() - start
+        assert "".join(chunks) == full
+        print(f"gemini      {len(chunks)} chunks  blocking {blocking:6.3f}s  "
+              f"stream first chunk {first:6.3f}s  complete {streamed:6.3f}s")
+    finally:
+        server.shutdown()
+
+
+def _sqlite_app(path):
+    from flask import Flask
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def run_order_ingest(orders=20000, baseline_orders=2000, clients=16, n_symbols=8):
+    """
+    Load test for order ingestion on a throwaway SQLite file: a commit per
+    order (the old /order path) against the batched write-behind pipeline.
+    Reports acknowledged orders/sec and sustained orders/sec (until every
+    order and trade row is committed).
+    """
+    rng = random.Random(0)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    batch = [(rng.choice(symbols), rng.choice(("buy", "sell")),
+              round(rng.uniform(99, 101), 2), rng.randint(1, 10)) for _ in range(orders)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _sqlite_app(os.path.join(tmp, "baseline.db"))
+        engine = MatchingEngine()
+
+        def place_sync(order):
+            symbol, side, price, qty = order
+            with app.app_context():
+                row = Order(symbol=symbol, side=side, price=price, quantity=qty)
+                db.session.add(row)
+                db.session.commit()
+                for t in engine.insert_order(symbol, side, price, qty, order_id=row.id):
+                    db.session.add(Trade(buy_price=t["buy_price"], sell_price=t["sell_price"],
+                                         quantity=t["quantity"]))
+                db.session.commit()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(place_sync, batch[:baseline_orders]))
+        baseline = baseline_orders / (time.perf_counter() - start)
+        engine.shutdown()
+
+        app = _sqlite_app(os.path.join(tmp, "pipeline.db"))
+        engine = MatchingEngine()
+        ingestor = OrderIngestor(max_pending=orders * 4)
+        ingestor.start(app)
+
+        def place_async(order):
+            symbol, side, price, qty = order
+            with app.app_context():
+                order_id = ingestor.next_order_id()
+            ingestor.add_order({"id": order_id, "symbol": symbol, "side": side,
+                                "price": price, "quantity": qty, "status": "open"})
+            future = engine.submit_order(symbol, side, price, qty, order_id=order_id)
+            future.add_done_callback(lambda f: ingestor.add_trades(f.result()))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(place_async, batch))
+        acked = orders / (time.perf_counter() - start)
+        engine.shutdown()  # joins the matchers, so every trade is queued before draining
+        ingestor.drain()
+        sustained = orders / (time.perf_counter() - start)
+        stats = ingestor.stats()
+        with app.app_context():
+            assert db.session.query(Order).count() == orders
+        print(f"ingest      commit-per-order {baseline:>9,.0f}/s  pipeline acked {acked:>9,.0f}/s  "
+              f"sustained {sustained:>9,.0f}/s  ({stats['batches']} batches, "
+              f"{stats['trades_written']} trades)")
+
+
+def run_event_bus(orders=20000, clients=200, n_symbols=4):
+    """
+    Burst of orders with `clients` subscribers spread over `n_symbols`
+    books: packets a client would receive with one emit per delta and per
+    trade, against the event bus's per-window batches.
+    """
+    emitted = []
+    bus = EventBus(emit=lambda event, payload, to: emitted.append(event),
+                   snapshot=lambda symbol: {"symbol": symbol})
+    engine = MatchingEngine(on_delta=bus.publish_delta)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    for i in range(clients):
+        bus.subscribe(f"client{i}", symbols[i % n_symbols])
+    bus.start()
+
+    rng = random.Random(0)
+    trades = [0]
+
+    def on_done(symbol, future):
+        result = future.result()
+        trades[0] += len(result)
+        bus.publish_trades(symbol, result)
+
+    start = time.perf_counter()
+    for _ in range(orders):
+        symbol = rng.choice(symbols)
+        future = engine.submit_order(symbol, rng.choice(("buy", "sell")), round(rng.uniform(99, 101), 2),
+                                     rng.randint(1, 10))
+        future.add_done_callback(lambda f, s=symbol: on_done(s, f))
+    engine.shutdown()
+    elapsed = time.perf_counter() - start
+    time.sleep(bus.window * 3)
+
+    per_client = clients / n_symbols
+    naive = (orders + trades[0]) * per_client
+    stats = bus.stats()
+    print(f"event_bus   {orders} orders in {elapsed:6.3f}s  per-event emits {naive:>11,.0f}  "
+          f"batched emits {stats['emitted']:>7,}  mean latency {stats['emit_latency_mean_ms']:5.1f}ms")
+
+
+# Minimal eventlet server for run_serving: /work runs one /simulate-sized job
+# inline on the hub or through the offloader (tpool); /ping is trivial
+_SERVE_PROBE = """
+import sys
+import eventlet
+eventlet.monkey_patch()
+from eventlet import wsgi
+from flask import Flask, jsonify
+from simulation import simulate_summary
+from offload import offloader
+
+mode, port = sys.argv[1], int(sys.argv[2])
+app = Flask(__name__)
+args = (100.0, 100_000, 60, 0.0005, 0.01, 1)
+
+@app.route("/ping")
+def ping():
+    return "ok"
+
+@app.route("/work")
+def work():
+    if mode == "offload":
+        summary, _ = offloader.process(simulate_summary, *args)
+    else:
+        summary, _ = simulate_summary(*args)
+    return jsonify(summary)
+
+print("ready", flush=True)
+wsgi.server(eventlet.listen(("127.0.0.1", port)), app, log_output=False)
+"""
+
+
+def _free_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_serving(jobs=48, concurrency=16):
+    """
+    Load test of an eventlet server doing /simulate-sized work: `jobs`
+    requests from `concurrency` clients, with a /ping probe alongside to
+    show whether the hub stays responsive. Inline (before) vs offloaded
+    (after).
+    """
+    for mode in ("inline", "offload"):
+        port = _free_port()
+        proc = subprocess.Popen([sys.executable, "-c", _SERVE_PROBE, mode, str(port)],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.PIPE, text=True)
+        try:
+            proc.stdout.readline()  # "ready"
+            url = f"http://127.0.0.1:{port}"
+            pings = []
+            done = threading.Event()
+
+            def probe():
+                session = requests.Session()
+                while not done.is_set():
+                    start = time.perf_counter()
+                    session.get(url + "/ping", timeout=60)
+                    pings.append(time.perf_counter() - start)
+                    time.sleep(0.01)
+
+            prober = threading.Thread(target=probe, daemon=True)
+            start = time.perf_counter()
+            prober.start()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(lambda _: requests.get(url + "/work", timeout=300).json(), range(jobs)))
+            elapsed = time.perf_counter() - start
+            done.set()
+            prober.join()
+            print(f"serving     {mode:<8} {jobs / elapsed:7.1f} req/s  "
+                  f"ping p50 {sorted(pings)[len(pings) // 2] * 1000:7.1f}ms  max {max(pings) * 1000:7.1f}ms")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+BENCHMARKS = {
+    "order_book": run_order_book,
+    "matching_engine": run_matching_engine,
+    "memory": run_memory,
+    "simulation": run_simulation,
+    "http_client": run_http_client,
+    "gemini_stream": run_gemini_stream,
+    "order_ingest": run_order_ingest,
+    "event_bus": run_event_bus,
+    "serving": run_serving,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
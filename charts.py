@@ -0,0 +1,23 @@
+# charts.py
+import io
+
+from matplotlib.figure import Figure
+
+
+def render_line_chart(title, dates, values, label):
+    """
+    PNG bytes of a simple price chart. Uses a standalone Figure rather than
+    pyplot's global state, so concurrent renders on worker threads or
+    processes don't interfere.
+    """
+    fig = Figure(figsize=(6, 3))
+    ax = fig.subplots()
+    ax.plot(dates, values, label=label)
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Price (USD)")
+    ax.legend()
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
@@ -21,3 +21,106 @@ class Config:
     FINNHUB_KEY = os.getenv("FINNHUB_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+    # Outbound HTTP client (see http_client.py); timeouts in seconds
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+    HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", 8))
+    GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 30))
+
+    # Gemini reply cache and summary pre-warming (see gemini_client.py); seconds
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+    GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", 300))
+    GEMINI_CACHE_SIZE = int(os.getenv("GEMINI_CACHE_SIZE", 512))
+    GEMINI_PREWARM_TOP_N = int(os.getenv("GEMINI_PREWARM_TOP_N", 5))
+    GEMINI_PREWARM_INTERVAL = float(os.getenv("GEMINI_PREWARM_INTERVAL", 60))
+    GEMINI_PREWARM_BEFORE = float(os.getenv("GEMINI_PREWARM_BEFORE", 90))
+
+    # Order ingestion pipeline (see order_ingest.py)
+    ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", 500))
+    ORDER_FLUSH_MS = float(os.getenv("ORDER_FLUSH_MS", 50))
+    ORDER_QUEUE_SIZE = int(os.getenv("ORDER_QUEUE_SIZE", 10000))
+    ORDER_ID_BLOCK = int(os.getenv("ORDER_ID_BLOCK", 100))
+
+    # Seconds a request waits on a symbol's matching worker before giving up
+    MATCHING_TIMEOUT = float(os.getenv("MATCHING_TIMEOUT", 5))
+    # Books live in one process's memory, so the order book needs WEB_WORKERS=1;
+    # set 0 to run several workers without it (its endpoints then answer 503)
+    ORDER_BOOK_ENABLED = os.getenv("ORDER_BOOK_ENABLED", "1") == "1"
+    # Most price levels per side an order book snapshot returns
+    ORDER_BOOK_MAX_DEPTH = int(os.getenv("ORDER_BOOK_MAX_DEPTH", 100))
+
+    # Outbound Socket.IO event bus (see event_bus.py)
+    EVENT_BUS_WINDOW_MS = float(os.getenv("EVENT_BUS_WINDOW_MS", 50))
+    EVENT_BUS_MAX_BACKLOG = int(os.getenv("EVENT_BUS_MAX_BACKLOG", 64))
+    EVENT_BUS_MAX_CHANGES = int(os.getenv("EVENT_BUS_MAX_CHANGES", 500))
+    EVENT_BUS_MAX_TRADES = int(os.getenv("EVENT_BUS_MAX_TRADES", 500))
+
+    # Socket.IO scale-out (see realtime.py, leader.py). SOCKETIO_MESSAGE_QUEUE is
+    # empty for a single process, "local://" for the in-process stand-in, or a
+    # broker URL such as redis://localhost:6379/0 shared by every worker. Several
+    # workers also need Redis for market subscriptions: a redis:// queue, or
+    # LEADER_LOCK_URL alongside another broker
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+    SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "flask-socketio")
+    LEADER_LOCK_URL = os.getenv("LEADER_LOCK_URL", "")
+    LEADER_LOCK_DIR = os.getenv("LEADER_LOCK_DIR", "locks")
+
+    # Serving (see wsgi.py, gunicorn.conf.py, offload.py). ASYNC_MODE and
+    # OFFLOAD_THREADS must be set in the environment: wsgi.py reads them before
+    # monkey-patching, ahead of .env loading
+    ASYNC_MODE = os.getenv("ASYNC_MODE", "eventlet")  # eventlet | gevent
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", 5000))
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", 1))
+    WORKER_CONNECTIONS = int(os.getenv("WORKER_CONNECTIONS", 1000))
+    OFFLOAD_THREADS = int(os.getenv("OFFLOAD_THREADS", 20))
+    COMPUTE_PROCESSES = int(os.getenv("COMPUTE_PROCESSES", 0))  # 0 = one per CPU
+
+    # Background prediction jobs (see jobs.py, prediction_jobs.py)
+    PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", 2))
+    PREDICT_MAX_PENDING = int(os.getenv("PREDICT_MAX_PENDING", 32))
+    # A cached prediction is redone after this long even without a new stored bar,
+    # so the job gets to sync bars nothing else has refreshed
+    PREDICT_CACHE_SECONDS = float(os.getenv("PREDICT_CACHE_SECONDS", 900))
+
+    # Scheduled jobs (see scheduler.py). Cron expressions use SCHEDULER_TIMEZONE;
+    # intervals, jitter and timeouts are in seconds
+    WATCHLIST = [s.strip().upper() for s in os.getenv("WATCHLIST", "AAPL,MSFT,GOOG").split(",") if s.strip()]
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+    SCHEDULER_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "America/New_York")
+    SCHEDULER_THREADS = int(os.getenv("SCHEDULER_THREADS", 4))
+    SCHEDULER_RESULTS_DIR = os.getenv("SCHEDULER_RESULTS_DIR", "scheduled_results")
+    SCHEDULE_BACKFILL_CRON = os.getenv("SCHEDULE_BACKFILL_CRON", "30 17 * * mon-fri")
+    SCHEDULE_RETRAIN_CRON = os.getenv("SCHEDULE_RETRAIN_CRON", "0 18 * * mon-fri")
+    SCHEDULE_RETRAIN_TIMEOUT = float(os.getenv("SCHEDULE_RETRAIN_TIMEOUT", 3600))
+    SCHEDULE_CRON_JITTER = float(os.getenv("SCHEDULE_CRON_JITTER", 300))
+    SCHEDULE_SIGNALS_SECONDS = float(os.getenv("SCHEDULE_SIGNALS_SECONDS", 60))
+    SCHEDULE_BANDS_SECONDS = float(os.getenv("SCHEDULE_BANDS_SECONDS", 900))
+    SCHEDULE_NEWS_SECONDS = float(os.getenv("SCHEDULE_NEWS_SECONDS", 300))
+
+    # Monte Carlo simulation (see simulation.py): POST /simulate refuses
+    # requests for more than this many simulated price steps (simulations * days)
+    SIMULATION_MAX_STEPS = int(os.getenv("SIMULATION_MAX_STEPS", 5_000_000))
+
+    # Quote service (see quote_service.py); seconds
+    QUOTE_MAX_AGE = float(os.getenv("QUOTE_MAX_AGE", 2))
+    QUOTE_HEDGE_DELAY = float(os.getenv("QUOTE_HEDGE_DELAY", 0.3))
+
+    # Trained model cache (see model_registry.py)
+    MODEL_DIR = os.getenv("MODEL_DIR", "model_store")
+    MODEL_TTL_SECONDS = int(os.getenv("MODEL_TTL_SECONDS", 24 * 3600))
+    MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", 16))
+
+    # OHLCV history cache (see ohlcv_cache.py); TTLs in seconds
+    OHLCV_CACHE_SIZE = int(os.getenv("OHLCV_CACHE_SIZE", 256))
+    OHLCV_TTL_INTRADAY = float(os.getenv("OHLCV_TTL_INTRADAY", 5))
+    OHLCV_TTL_DAILY = float(os.getenv("OHLCV_TTL_DAILY", 300))
+
+    # On-disk bar store (see bar_store.py)
+    BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", "bar_store_data")
+    BAR_STORE_BACKFILL = os.getenv("BAR_STORE_BACKFILL", "5y")
+    BAR_STORE_SYNC_SECONDS = float(os.getenv("BAR_STORE_SYNC_SECONDS", 300))
+
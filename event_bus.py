@@ -0,0 +1,267 @@
+# event_bus.py
+import time
+import threading
+from collections import OrderedDict, deque
+
+
+def merge_delta(into, delta):
+    """
+    Fold a later order book delta into an earlier one. Level changes carry
+    absolute quantities, so the last change per (side, price) wins and the
+    merged delta covers seq numbers from_seq..seq.
+    """
+    for change in delta["changes"]:
+        into["changes"][(change["side"], change["price"])] = change
+    into["seq"] = delta["seq"]
+    return into
+
+
+def _pending(symbol, delta):
+    return {"symbol": symbol, "from_seq": delta.get("from_seq", delta["seq"]), "seq": delta["seq"],
+            "changes": {(c["side"], c["price"]): c for c in delta["changes"]}}
+
+
+def _wire(delta):
+    return {"symbol": delta["symbol"], "from_seq": delta["from_seq"], "seq": delta["seq"],
+            "changes": list(delta["changes"].values())}
+
+
+class ClientQueue:
+    """
+    Outbound state for one client: at most one merged delta per symbol, a
+    bounded deque of trades, and the symbols that need a snapshot because
+    their deltas were dropped.
+    """
+
+    __slots__ = ("deltas", "trades", "stale", "symbols")
+
+    def __init__(self, max_trades):
+        self.deltas = OrderedDict()  # symbol -> pending merged delta
+        self.trades = deque(maxlen=max_trades)  # (symbol, trade)
+        self.stale = set()
+        self.symbols = set()
+
+
+class EventBus:
+    """
+    Outbound Socket.IO events for order books and trades.
+
+    Publishers (the matching workers) only append to per-symbol buffers.
+    Every `window` seconds a flusher merges each symbol's deltas into one
+    `orderbook_delta` (from_seq..seq) and its trades into one `trade_batch`,
+    and hands them to the subscribed clients.
+
+    Each client has a bounded queue. While a client's transport backlog is
+    above `max_backlog` packets it is skipped: its pending deltas keep
+    merging, and once one grows past `max_changes` levels it is dropped and
+    the symbol is resent as a fresh `orderbook_snapshot` when the client
+    catches up. Trades beyond `max_trades` drop the oldest.
+    """
+
+    def __init__(self, emit, snapshot, backlog=None, window=0.05, max_backlog=64,
+                 max_changes=500, max_trades=500):
+        self.emit = emit  # emit(event, payload, to=sid)
+        self.snapshot = snapshot  # snapshot(symbol) -> full book with seq
+        self.backlog = backlog or (lambda sid: 0)  # packets waiting in the client's transport
+        self.window = window
+        self.max_backlog = max_backlog
+        self.max_changes = max_changes
+        self.max_trades = max_trades
+        self.clients = {}  # sid -> ClientQueue
+        self.subscribers = {}  # symbol -> set of sids
+        self._deltas = {}  # symbol -> pending merged delta
+        self._trades = {}  # symbol -> list of trades
+        self._since = None  # monotonic time of the oldest unflushed event
+        self._lock = threading.Lock()
+        self._thread = None
+        self.published = 0
+        self.emitted = 0
+        self.conflated = 0
+        self.dropped_deltas = 0
+        self.dropped_trades = 0
+        self.resyncs = 0
+        self.flushes = 0
+        self.latency_samples = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    # ---- subscriptions ----
+    def subscribe(self, sid, symbol):
+        with self._lock:
+            client = self.clients.get(sid)
+            if client is None:
+                client = self.clients[sid] = ClientQueue(self.max_trades)
+            client.symbols.add(symbol)
+            # the caller sends a snapshot, which supersedes anything queued
+            client.deltas.pop(symbol, None)
+            client.stale.discard(symbol)
+            self.subscribers.setdefault(symbol, set()).add(sid)
+
+    def unsubscribe(self, sid, symbol):
+        with self._lock:
+            client = self.clients.get(sid)
+            if client is not None:
+                client.symbols.discard(symbol)
+                client.deltas.pop(symbol, None)
+                client.stale.discard(symbol)
+                client.trades = deque(((s, t) for s, t in client.trades if s != symbol),
+                                      maxlen=self.max_trades)
+                if not client.symbols:
+                    del self.clients[sid]
+            sids = self.subscribers.get(symbol)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self.subscribers[symbol]
+
+    def remove_client(self, sid):
+        with self._lock:
+            client = self.clients.pop(sid, None)
+            for symbol in (client.symbols if client else ()):
+                sids = self.subscribers.get(symbol)
+                if sids is not None:
+                    sids.discard(sid)
+                    if not sids:
+                        del self.subscribers[symbol]
+
+    # ---- publishing ----
+    def publish_delta(self, symbol, delta):
+        """MatchingEngine on_delta hook."""
+        with self._lock:
+            self.published += 1
+            if self._since is None:
+                self._since = time.monotonic()
+            pending = self._deltas.get(symbol)
+            if pending is None:
+                self._deltas[symbol] = _pending(symbol, delta)
+            else:
+                merge_delta(pending, delta)
+                self.conflated += 1
+
+    def publish_trades(self, symbol, trades):
+        if not trades:
+            return
+        with self._lock:
+            self.published += len(trades)
+            if self._since is None:
+                self._since = time.monotonic()
+            self._trades.setdefault(symbol, []).extend(trades)
+
+    # ---- delivery ----
+    def flush(self):
+        """Distribute one window's worth of events and send what each client can take."""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            trades, self._trades = self._trades, {}
+            since, self._since = self._since, None
+            for symbol, delta in deltas.items():
+                for sid in self.subscribers.get(symbol, ()):
+                    self._queue_delta(self.clients[sid], symbol, delta)
+            for symbol, batch in trades.items():
+                for sid in self.subscribers.get(symbol, ()):
+                    client = self.clients[sid]
+                    overflow = len(client.trades) + len(batch) - self.max_trades
+                    if overflow > 0:
+                        self.dropped_trades += overflow
+                    client.trades.extend((symbol, t) for t in batch)
+            ready = [(sid, client) for sid, client in self.clients.items()
+                     if client.deltas or client.trades or client.stale]
+
+        sent = 0
+        for sid, client in ready:
+            if self.backlog(sid) > self.max_backlog:
+                continue
+            sent += self._send(sid, client)
+
+        with self._lock:
+            self.flushes += 1
+            self.emitted += sent
+            if since is not None and sent:
+                latency = time.monotonic() - since
+                self.latency_samples += 1
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+
+    def _queue_delta(self, client, symbol, delta):
+        if symbol in client.stale:
+            return
+        pending = client.deltas.get(symbol)
+        if pending is None:
+            client.deltas[symbol] = {**delta, "changes": dict(delta["changes"])}
+            return
+        pending["changes"].update(delta["changes"])
+        pending["seq"] = delta["seq"]
+        self.conflated += 1
+        if len(pending["changes"]) > self.max_changes:
+            del client.deltas[symbol]
+            client.stale.add(symbol)
+            self.dropped_deltas += 1
+
+    def _send(self, sid, client):
+        with self._lock:
+            stale, client.stale = client.stale, set()
+            deltas, client.deltas = client.deltas, OrderedDict()
+            trades = list(client.trades)
+            client.trades.clear()
+            self.resyncs += len(stale)
+
+        sent = 0
+        for symbol in stale:
+            self.emit("orderbook_snapshot", self.snapshot(symbol), to=sid)
+            sent += 1
+        for delta in deltas.values():
+            self.emit("orderbook_delta", _wire(delta), to=sid)
+            sent += 1
+        by_symbol = {}
+        for symbol, trade in trades:
+            by_symbol.setdefault(symbol, []).append(trade)
+        for symbol, batch in by_symbol.items():
+            self.emit("trade_batch", {"symbol": symbol, "trades": batch}, to=sid)
+            sent += 1
+        return sent
+
+    def run(self):
+        while True:
+            start = time.monotonic()
+            try:
+                self.flush()
+            except Exception as e:
+                print("Error flushing event bus:", e)
+            time.sleep(max(self.window - (time.monotonic() - start), 0))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="event-bus", daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self.clients),
+                "published": self.published,
+                "emitted": self.emitted,
+                "conflated": self.conflated,
+                "dropped_deltas": self.dropped_deltas,
+                "dropped_trades": self.dropped_trades,
+                "resyncs": self.resyncs,
+                "flushes": self.flushes,
+                "emit_latency_mean_ms": (self.latency_total / self.latency_samples * 1000
+                                         if self.latency_samples else None),
+                "emit_latency_max_ms": self.latency_max * 1000,
+            }
+
+
+def socketio_backlog(socketio, namespace="/"):
+    """
+    backlog(sid) for a Flask-SocketIO server: packets queued in the client's
+    Engine.IO socket that the transport has not written yet.
+    """
+    def backlog(sid):
+        try:
+            server = socketio.server
+            eio_sid = server.manager.eio_sid_from_sid(sid, namespace)
+            sock = server.eio.sockets.get(eio_sid)
+            return sock.queue.qsize() if sock is not None else 0
+        except Exception:
+            return 0
+    return backlog
@@ -1,9 +1,12 @@
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, request, jsonify, render_template, Response, stream_with_context
+from flask_socketio import emit
 from config import Config
 from market_data import fetch_latest_news
-from gemini_client import ask_gemini
-from realtime import broadcast_news
-import requests
+from gemini_client import ask_gemini, stream_gemini, sse_events, gemini_stats
+from realtime import socketio, broadcast_news
+from http_client import http_client
+from quote_service import quote_service
+from result_store import scheduled_results
 from datetime import date, timedelta
 
 extra_bp = Blueprint("extra_bp", __name__)
@@ -69,7 +72,7 @@ def get_realtime_news():
     # """
     try:
         url = f"https://finnhub.io/api/v1/company-news?symbol=AAPL&from=2024-10-01&to=2025-10-13&token={Config.FINNHUB_KEY}"
-        response = requests.get(url, timeout=5)
+        response = http_client.get(url, timeout=5)
         if response.status_code != 200:
             return jsonify({"error": "Failed to fetch news"}), 500
 
@@ -92,6 +95,15 @@ def get_realtime_news():
         return jsonify({"error": str(e)}), 500
 
 
+@extra_bp.route("/api/news/latest", methods=["GET"])
+def get_latest_news():
+    """General market headlines as last prefetched by the scheduler, else fetched now."""
+    stored = scheduled_results.get("news")
+    if stored is not None:
+        return jsonify({"news": stored["value"], "updated_at": stored["updated_at"]})
+    return jsonify({"news": fetch_latest_news()})
+
+
 # ------------------ CHATBOT ------------------
 
 @extra_bp.route("/api/chat", methods=["POST"])
@@ -110,6 +122,51 @@ def chatbot_response():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@extra_bp.route("/api/chat/stream", methods=["POST"])
+def chatbot_stream():
+    """
+    Streaming /api/chat: the reply arrives as server-sent events
+    (`data: {"text": ...}` per chunk, then `event: done`).
+    """
+    data = request.get_json(silent=True)
+    if not data or "message" not in data:
+        return jsonify({"error": "Message is required"}), 400
+    return Response(stream_with_context(sse_events(stream_gemini(data["message"]))),
+                    mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@socketio.on("chat_message")
+def chat_message(data):
+    """
+    Socket.IO chat: emits `chat_chunk` {id, text} to the sender for each
+    chunk, then `chat_done` {id, reply} (or `chat_error` {id, error}).
+    """
+    data = data or {}
+    msg_id = data.get("id")
+    if not data.get("message"):
+        emit("chat_error", {"id": msg_id, "error": "Message is required"})
+        return
+    chunks = []
+    try:
+        for text in stream_gemini(data["message"]):
+            chunks.append(text)
+            emit("chat_chunk", {"id": msg_id, "text": text})
+    except Exception as e:
+        emit("chat_error", {"id": msg_id, "error": str(e)})
+        return
+    emit("chat_done", {"id": msg_id, "reply": "".join(chunks)})
+
+
+@extra_bp.route("/api/gemini/stats", methods=["GET"])
+def gemini_cache_stats():
+    return jsonify(gemini_stats())
+
+
+@extra_bp.route("/api/quotes/stats", methods=["GET"])
+def quote_stats():
+    return jsonify(quote_service.stats())
+
+
 @extra_bp.route("/api/chat", methods=["GET"])
 def chat_history():
     # return dummy empty history for now
@@ -1,12 +1,24 @@
-
-import requests
+# gemini_client.py
 import os
+import json
+import time
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+
 from config import Config
+from http_client import http_client
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_URL = "{base}/models/{model}:generateContent"
+GEMINI_STREAM_URL = "{base}/models/{model}:streamGenerateContent?alt=sse"
+
+
+class GeminiError(Exception):
+    """Non-200 answer from the Gemini API."""
 
-def ask_gemini(prompt):
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+
+def _request(prompt):
     headers = {
         "Content-Type": "application/json",
         "x-goog-api-key": GEMINI_API_KEY
@@ -16,11 +28,290 @@ def ask_gemini(prompt):
             {"parts": [{"text": prompt}]}
         ]
     }
+    return headers, payload
+
+
+def _chunk_text(data):
+    parts = data["candidates"][0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
 
-    response = requests.post(url, headers=headers, json=payload)
+
+def generate_content(prompt, model=Config.GEMINI_MODEL, base_url=Config.GEMINI_BASE_URL):
+    """One uncached generateContent call. Returns the reply text."""
+    url = GEMINI_URL.format(base=base_url, model=model)
+    headers, payload = _request(prompt)
+
+    response = http_client.post(url, headers=headers, json=payload,
+                                timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.GEMINI_TIMEOUT))
 
     if response.status_code == 200:
         data = response.json()
         return data["candidates"][0]["content"]["parts"][0]["text"]
-    else:
-        return f"Gemini API Error {response.status_code}: {response.text}"
+    raise GeminiError(f"Gemini API Error {response.status_code}: {response.text}")
+
+
+def stream_content(prompt, model=Config.GEMINI_MODEL, base_url=Config.GEMINI_BASE_URL):
+    """
+    Uncached streamGenerateContent call. Yields text chunks as the server
+    sends them (server-sent events, one JSON response per `data:` line).
+    """
+    url = GEMINI_STREAM_URL.format(base=base_url, model=model)
+    headers, payload = _request(prompt)
+
+    with http_client.post(url, headers=headers, json=payload, stream=True,
+                          timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.GEMINI_TIMEOUT)) as response:
+        if response.status_code != 200:
+            raise GeminiError(f"Gemini API Error {response.status_code}: {response.text}")
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            text = _chunk_text(json.loads(line[len("data:"):]))
+            if text:
+                yield text
+
+
+def _normalize(prompt):
+    return " ".join(prompt.split())
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of Gemini replies keyed by (model, normalized prompt).
+
+    Concurrent misses for the same key are coalesced into one upstream call,
+    as in OHLCVCache. Errors are passed to every waiter but never cached.
+    """
+
+    def __init__(self, fetcher=generate_content, ttl=300, capacity=512):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.capacity = capacity
+        self._entries = OrderedDict()  # key -> (expires_at, text)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.upstream_max = 0.0
+
+    def get(self, prompt, model=Config.GEMINI_MODEL, force=False):
+        """
+        Cached reply for the prompt. force=True skips the cached entry (but
+        still joins a call already in flight), for refreshing.
+        """
+        key = (model, _normalize(prompt))
+        with self._lock:
+            entry = self._entries.get(key)
+            if not force and entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        start = time.monotonic()
+        try:
+            text = self.fetcher(prompt, model)
+        except Exception as e:
+            with self._lock:
+                self._record(time.monotonic() - start)
+                self.errors += 1
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._record(time.monotonic() - start)
+            self._store(key, text)
+            del self._inflight[key]
+        future.set_result(text)
+        return text
+
+    def _record(self, elapsed):
+        self.upstream_calls += 1
+        self.upstream_seconds += elapsed
+        self.upstream_max = max(self.upstream_max, elapsed)
+
+    def peek(self, prompt, model=Config.GEMINI_MODEL):
+        """Fresh cached reply or None; counts as a hit or a miss."""
+        key = (model, _normalize(prompt))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, prompt, text, model=Config.GEMINI_MODEL):
+        """Store a reply obtained elsewhere (e.g. assembled from a stream)."""
+        with self._lock:
+            self._store((model, _normalize(prompt)), text)
+
+    def _store(self, key, text):
+        self._entries[key] = (time.monotonic() + self.ttl, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def expires_in(self, prompt, model=Config.GEMINI_MODEL):
+        """Seconds until the cached reply expires (<= 0 if absent or stale)."""
+        with self._lock:
+            entry = self._entries.get((model, _normalize(prompt)))
+        return entry[0] - time.monotonic() if entry is not None else 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "upstream_calls": self.upstream_calls,
+                "upstream_mean_seconds": (self.upstream_seconds / self.upstream_calls
+                                          if self.upstream_calls else None),
+                "upstream_max_seconds": self.upstream_max,
+            }
+
+
+def market_summary_prompt(symbol):
+    return f"Give latest concise market summary for {symbol} stock performance and investor sentiment."
+
+
+class SummaryRefresher:
+    """
+    Keeps market summaries for the most requested symbols warm.
+
+    /news requests bump a decaying per-symbol count. Every `interval`
+    seconds the `top_n` most popular symbols whose cached summary expires
+    within `refresh_before` seconds are re-fetched in the background, so
+    readers keep hitting the cache.
+    """
+
+    def __init__(self, cache, top_n=5, interval=60, refresh_before=90, decay=0.9):
+        self.cache = cache
+        self.top_n = top_n
+        self.interval = interval
+        self.refresh_before = refresh_before
+        self.decay = decay
+        self.counts = Counter()
+        self.refreshed = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, symbol):
+        with self._lock:
+            self.counts[symbol.upper()] += 1
+
+    def popular(self):
+        with self._lock:
+            return [symbol for symbol, _ in self.counts.most_common(self.top_n)]
+
+    def tick(self):
+        for symbol in self.popular():
+            prompt = market_summary_prompt(symbol)
+            if self.cache.expires_in(prompt) > self.refresh_before:
+                continue
+            try:
+                self.cache.get(prompt, force=True)
+                self.refreshed += 1
+            except Exception as e:
+                print(f"Summary refresh failed for {symbol}: {e}")
+        with self._lock:
+            for symbol in list(self.counts):
+                self.counts[symbol] *= self.decay
+                if self.counts[symbol] < 0.1:
+                    del self.counts[symbol]
+
+    def run(self):
+        while True:
+            self.tick()
+            time.sleep(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+
+
+response_cache = ResponseCache(ttl=Config.GEMINI_CACHE_TTL, capacity=Config.GEMINI_CACHE_SIZE)
+summary_refresher = SummaryRefresher(response_cache, top_n=Config.GEMINI_PREWARM_TOP_N,
+                                     interval=Config.GEMINI_PREWARM_INTERVAL,
+                                     refresh_before=Config.GEMINI_PREWARM_BEFORE)
+
+
+def ask_gemini(prompt, model=Config.GEMINI_MODEL):
+    try:
+        return response_cache.get(prompt, model)
+    except GeminiError as e:
+        return str(e)
+
+
+def stream_gemini(prompt, model=Config.GEMINI_MODEL):
+    """
+    Streaming ask_gemini: yields reply chunks as they arrive. A cached reply
+    comes back as a single chunk; a streamed one is cached once complete.
+    Upstream errors are raised (GeminiError), not yielded.
+    """
+    cached = response_cache.peek(prompt, model)
+    if cached is not None:
+        yield cached
+        return
+    chunks = []
+    for text in stream_content(prompt, model):
+        chunks.append(text)
+        yield text
+    response_cache.put(prompt, "".join(chunks), model)
+
+
+def sse_events(chunks):
+    """Wrap a chunk generator as server-sent events: one `data:` JSON per chunk, then `done`."""
+    try:
+        for text in chunks:
+            yield f"data: {json.dumps({'text': text})}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
+
+def get_market_summary(symbol):
+    """Cached market summary for /news; counts towards the symbol's popularity."""
+    summary_refresher.record(symbol)
+    return ask_gemini(market_summary_prompt(symbol))
+
+
+def stream_market_summary(symbol):
+    summary_refresher.record(symbol)
+    return stream_gemini(market_summary_prompt(symbol))
+
+
+def gemini_stats():
+    return {**response_cache.stats(), "popular": summary_refresher.popular(),
+            "prewarmed": summary_refresher.refreshed}
+
+
+def start_summary_refresher():
+    summary_refresher.start()
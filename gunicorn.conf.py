@@ -0,0 +1,13 @@
+# gunicorn.conf.py -- gunicorn -c gunicorn.conf.py wsgi:app
+from config import Config
+
+bind = f"{Config.HOST}:{Config.PORT}"
+workers = Config.WEB_WORKERS
+worker_connections = Config.WORKER_CONNECTIONS
+if Config.ASYNC_MODE == "gevent":
+    worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
+else:
+    worker_class = "eventlet"
+# Long-lived Socket.IO connections: don't recycle idle-looking workers
+timeout = 120
+graceful_timeout = 30
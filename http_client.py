@@ -0,0 +1,97 @@
+# http_client.py
+import asyncio
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import Config
+
+
+class SafeRetry(Retry):
+    """
+    Retry with urllib3's default idempotent allowed_methods, so a POST is
+    never resent after a read timeout or a 5xx: the server may already have
+    acted on it (a duplicate billed Gemini call, a second order). Any method
+    is still retried on connect errors and on 429 / 503, where the request
+    was refused before being processed.
+    """
+
+    REFUSED_STATUSES = frozenset({429, 503})
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if not self._is_method_retryable(method):
+            return status_code in self.REFUSED_STATUSES
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class HttpClient:
+    """
+    Shared HTTP client for outbound API calls (Finnhub, Gemini, ...).
+
+    One requests.Session with a pooled keep-alive adapter, default timeouts,
+    retry with exponential backoff on connection errors / 429 / 5xx (only
+    connection errors / 429 / 503 for non-idempotent methods), and a
+    per-host concurrency cap. Blocking calls are safe on eventlet green
+    threads; submit() and the async variants run on a small thread pool
+    so handlers can fan several upstream calls out at once.
+    """
+
+    def __init__(self, timeout=(3.05, 10), retries=2, backoff=0.3, pool_size=20,
+                 per_host_limit=8, max_workers=32):
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.session = requests.Session()
+        retry = SafeRetry(total=retries, backoff_factor=backoff,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http")
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._host_limits.get(host)
+            if sem is None:
+                sem = self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return sem
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        with self._host_limit(url):
+            return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def submit(self, method, url, **kwargs):
+        """Run request() in the background; returns a concurrent.futures.Future."""
+        return self._executor.submit(self.request, method, url, **kwargs)
+
+    def submit_call(self, fn, *args, **kwargs):
+        """Run any blocking call (e.g. a yfinance fetch) on the client's pool."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    async def arequest(self, method, url, **kwargs):
+        return await asyncio.wrap_future(self.submit(method, url, **kwargs))
+
+    async def aget(self, url, **kwargs):
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url, **kwargs):
+        return await self.arequest("POST", url, **kwargs)
+
+
+http_client = HttpClient(timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT),
+                         retries=Config.HTTP_RETRIES, pool_size=Config.HTTP_POOL_SIZE,
+                         per_host_limit=Config.HTTP_PER_HOST_LIMIT)
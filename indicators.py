@@ -0,0 +1,229 @@
+# indicators.py
+import math
+from collections import deque
+
+
+class SMA:
+    """Simple moving average over the last `window` values."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+
+    def update(self, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        return self.value
+
+    @property
+    def value(self):
+        if len(self.values) < self.window:
+            return None
+        return self.total / self.window
+
+    def state(self):
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state["window"])
+        for v in state["values"]:
+            obj.update(v)
+        return obj
+
+
+class EMA:
+    """Exponential moving average with alpha = 2 / (span + 1), seeded by the first value."""
+
+    def __init__(self, span, value=None):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = value
+
+    def update(self, value):
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def state(self):
+        return {"span": self.span, "value": self.value}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["span"], state["value"])
+
+
+class RollingExtreme:
+    """
+    Rolling max (or min) over the last `window` values using a monotonic
+    deque of (index, value): amortized O(1) per update.
+    """
+
+    def __init__(self, window, mode="max"):
+        self.window = window
+        self.mode = mode
+        self.count = 0
+        self.deque = deque()
+
+    def _dominates(self, a, b):
+        return a >= b if self.mode == "max" else a <= b
+
+    def update(self, value):
+        while self.deque and self._dominates(value, self.deque[-1][1]):
+            self.deque.pop()
+        self.deque.append((self.count, value))
+        self.count += 1
+        if self.deque[0][0] <= self.count - 1 - self.window:
+            self.deque.popleft()
+        return self.value
+
+    @property
+    def value(self):
+        return self.deque[0][1] if self.deque else None
+
+    def state(self):
+        return {"window": self.window, "mode": self.mode, "count": self.count,
+                "deque": [list(item) for item in self.deque]}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state["window"], state["mode"])
+        obj.count = state["count"]
+        obj.deque = deque(tuple(item) for item in state["deque"])
+        return obj
+
+
+class VWAP:
+    """Volume-weighted average of the typical price (H + L + C) / 3 since the last reset."""
+
+    def __init__(self, pv=0.0, volume=0.0):
+        self.pv = pv
+        self.volume = volume
+
+    def update(self, high, low, close, volume):
+        self.pv += (high + low + close) / 3.0 * volume
+        self.volume += volume
+        return self.value
+
+    def reset(self):
+        self.pv = 0.0
+        self.volume = 0.0
+
+    @property
+    def value(self):
+        return self.pv / self.volume if self.volume else None
+
+    def state(self):
+        return {"pv": self.pv, "volume": self.volume}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["pv"], state["volume"])
+
+
+class RollingVolatility:
+    """
+    Sample standard deviation of log returns over the last `window` bars,
+    from running sums of returns and squared returns.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.returns = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.last_price = None
+
+    def update(self, price):
+        if self.last_price is not None and self.last_price > 0 and price > 0:
+            r = math.log(price / self.last_price)
+            self.returns.append(r)
+            self.total += r
+            self.total_sq += r * r
+            if len(self.returns) > self.window:
+                old = self.returns.popleft()
+                self.total -= old
+                self.total_sq -= old * old
+        self.last_price = price
+        return self.value
+
+    @property
+    def value(self):
+        n = len(self.returns)
+        if n < self.window or n < 2:
+            return None
+        var = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def state(self):
+        return {"window": self.window, "returns": list(self.returns), "last_price": self.last_price}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state["window"])
+        for r in state["returns"]:
+            obj.returns.append(r)
+            obj.total += r
+            obj.total_sq += r * r
+        obj.last_price = state["last_price"]
+        return obj
+
+
+class IndicatorSet:
+    """
+    The indicators pushed with live prices, fed one OHLCV bar (a dict with
+    open/high/low/close/volume) at a time. state()/from_state() give a
+    JSON-serializable checkpoint.
+    """
+
+    def __init__(self, short_window=10, long_window=50, ema_span=20, range_window=20, vol_window=20):
+        self.sma_short = SMA(short_window)
+        self.sma_long = SMA(long_window)
+        self.ema = EMA(ema_span)
+        self.high = RollingExtreme(range_window, "max")
+        self.low = RollingExtreme(range_window, "min")
+        self.vwap = VWAP()
+        self.volatility = RollingVolatility(vol_window)
+
+    def update(self, bar):
+        close = bar["close"]
+        self.sma_short.update(close)
+        self.sma_long.update(close)
+        self.ema.update(close)
+        self.high.update(bar["high"])
+        self.low.update(bar["low"])
+        self.vwap.update(bar["high"], bar["low"], close, bar["volume"])
+        self.volatility.update(close)
+        return self.values()
+
+    def values(self):
+        return {
+            "sma_short": self.sma_short.value,
+            "sma_long": self.sma_long.value,
+            "ema": self.ema.value,
+            "rolling_high": self.high.value,
+            "rolling_low": self.low.value,
+            "vwap": self.vwap.value,
+            "volatility": self.volatility.value,
+        }
+
+    def state(self):
+        return {name: getattr(self, name).state()
+                for name in ("sma_short", "sma_long", "ema", "high", "low", "vwap", "volatility")}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls.__new__(cls)
+        obj.sma_short = SMA.from_state(state["sma_short"])
+        obj.sma_long = SMA.from_state(state["sma_long"])
+        obj.ema = EMA.from_state(state["ema"])
+        obj.high = RollingExtreme.from_state(state["high"])
+        obj.low = RollingExtreme.from_state(state["low"])
+        obj.vwap = VWAP.from_state(state["vwap"])
+        obj.volatility = RollingVolatility.from_state(state["volatility"])
+        return obj
@@ -0,0 +1,169 @@
+# jobs.py
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    """Too many distinct jobs in flight; retry later."""
+
+
+class Job:
+    def __init__(self, key, version):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.version = version  # data version the job was started for
+        self.status = "queued"  # queued / running / done / failed
+        self.stage = None
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    def wait(self, timeout=None):
+        """Block until the job is done or failed; False if it is still running after `timeout`."""
+        return self._finished.wait(timeout)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "key": self.key,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Background jobs keyed by what they compute (e.g. a symbol).
+
+    runner(key, progress) does the work on a pool of `max_workers` threads
+    and reports progress(stage, fraction). At most one job per key is in
+    flight: submitting a key that is already queued or running returns the
+    existing job. A finished job is the answer for its key until
+    version(key) (e.g. the last stored bar) changes or it is older than
+    `max_age` seconds. version() is called on the request path, so it must
+    be cheap; it is read again when the job finishes, since the job itself
+    may have brought the data up to date. Beyond `max_pending` distinct keys
+    in flight, submit raises JobQueueFull.
+
+    notify(event, job) is called with "progress" and "finished".
+    """
+
+    def __init__(self, runner, version=None, notify=None, max_workers=2, max_pending=32,
+                 max_jobs=1000, max_age=None):
+        self.runner = runner
+        self.version = version
+        self.max_age = max_age
+        self.notify = notify
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # id -> Job, oldest first
+        self._inflight = {}  # key -> Job
+        self._done = {}  # key -> last successful Job
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.submitted = 0
+        self.deduplicated = 0
+        self.cache_hits = 0
+        self.failed = 0
+
+    def submit(self, key):
+        version = self.version(key) if self.version else None
+        with self._lock:
+            done = self._done.get(key)
+            if (done is not None and version is not None and done.version == version
+                    and (self.max_age is None or time.time() - done.finished_at < self.max_age)):
+                self.cache_hits += 1
+                return done
+            job = self._inflight.get(key)
+            if job is not None:
+                self.deduplicated += 1
+                return job
+            if len(self._inflight) >= self.max_pending:
+                raise JobQueueFull(f"{len(self._inflight)} jobs already in flight")
+            job = Job(key, version)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self.submitted += 1
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        job.status = "running"
+        self._notify("progress", job)
+        try:
+            result = self.runner(job.key, lambda stage, fraction: self._progress(job, stage, fraction))
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.result = result
+            job.status = "done"
+            job.progress = 1.0
+            if self.version:
+                job.version = self._version_after(job.key, job.version)
+        job.finished_at = time.time()
+        with self._lock:
+            del self._inflight[job.key]
+            if job.status == "done":
+                self._done[job.key] = job
+            else:
+                self.failed += 1
+        job._finished.set()
+        self._notify("finished", job)
+
+    def _version_after(self, key, version):
+        try:
+            return self.version(key)
+        except Exception as e:
+            print(f"Error reading data version for {key}:", e)
+            return version
+
+    def _progress(self, job, stage, fraction):
+        job.stage = stage
+        job.progress = fraction
+        self._notify("progress", job)
+
+    def _notify(self, event, job):
+        if self.notify is None:
+            return
+        try:
+            self.notify(event, job)
+        except Exception as e:
+            print(f"Error notifying job {job.id}:", e)
+
+    def _prune(self):
+        # Forget the oldest finished jobs; in-flight and cached ones stay reachable
+        keep = {job.id for job in self._inflight.values()} | {job.id for job in self._done.values()}
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if job_id not in keep:
+                del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "cache_hits": self.cache_hits,
+                "failed": self.failed,
+                "in_flight": len(self._inflight),
+                "cached_results": len(self._done),
+                "jobs": len(self._jobs),
+            }
@@ -0,0 +1,100 @@
+# leader.py
+import os
+import uuid
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLeaderLock:
+    """
+    Leadership via an exclusive, non-blocking lock on a file: exactly one
+    process per host holds it, and the OS releases it if the holder dies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def is_leader(self):
+        """Try to become (or confirm being) the leader. Cheap once held."""
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class RedisLeaderLock:
+    """
+    Leadership via a Redis key with a TTL, for processes spread over several
+    hosts. The holder renews the key on every is_leader() call; if it stops
+    (or dies) the key expires and another process takes over after `ttl`
+    seconds.
+    """
+
+    # Renew only if we still own the key
+    RENEW = ("if redis.call('get', KEYS[1]) == ARGV[1] then "
+             "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end")
+
+    def __init__(self, url, name, ttl=30):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.key = f"leader:{name}"
+        self.ttl_ms = int(ttl * 1000)
+        self.token = uuid.uuid4().hex
+        self.held = False
+
+    def is_leader(self):
+        try:
+            if self.held:
+                self.held = bool(self.redis.eval(self.RENEW, 1, self.key, self.token, self.ttl_ms))
+            if not self.held:
+                self.held = bool(self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+        except Exception as e:
+            print(f"Leader lock {self.key} unavailable:", e)
+            self.held = False
+        return self.held
+
+    def release(self):
+        if self.held:
+            self.redis.eval("if redis.call('get', KEYS[1]) == ARGV[1] then "
+                            "return redis.call('del', KEYS[1]) else return 0 end", 1, self.key, self.token)
+            self.held = False
+
+
+def shared_redis_url():
+    """Redis shared by every process (LEADER_LOCK_URL, else a redis:// SOCKETIO_MESSAGE_QUEUE), or None."""
+    url = Config.LEADER_LOCK_URL or Config.SOCKETIO_MESSAGE_QUEUE
+    return url if url.startswith(("redis://", "rediss://")) else None
+
+
+def leader_lock(name, ttl=30):
+    """
+    Lock that elects one process to run `name`: Redis when one is configured
+    (LEADER_LOCK_URL, else a redis:// SOCKETIO_MESSAGE_QUEUE), otherwise a
+    lock file under LEADER_LOCK_DIR, which covers workers on a single host.
+    """
+    url = shared_redis_url()
+    if url:
+        return RedisLeaderLock(url, name, ttl)
+    return FileLeaderLock(os.path.join(Config.LEADER_LOCK_DIR, f"{name}.lock"))
@@ -1,31 +1,18 @@
-import requests
 from config import Config
-import yfinance as yf
+from http_client import http_client
+from bar_store import bar_store
+from quote_service import quote_service
 
 def get_price_for_symbol(symbol):
-    # Try Finnhub
-    try:
-        url = f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={Config.FINNHUB_KEY}"
-        resp = requests.get(url, timeout=5).json()
-        if resp and "c" in resp and resp["c"] is not None:
-            return float(resp["c"])
-    except:
-        pass
-
-    # fallback: yfinance
-    try:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period="1d", interval="1m")
-        if not df.empty:
-            return float(df["Close"].iloc[-1])
-    except:
-        pass
+    # Cached, hedged Finnhub / yfinance lookup (see quote_service.py)
+    return quote_service.get_price(symbol)
 
-    return None
+def get_prices_for_symbols(symbols):
+    return quote_service.get_prices(symbols)
 
 def get_ohlc_for_symbol(symbol, period="6mo"):
     try:
-        df = yf.download(symbol, period=period, interval="1d", progress=False)
+        df = bar_store.get_history(symbol, period=period, interval="1d")
         if df.empty:
             return None
         return df
@@ -35,7 +22,7 @@ def get_ohlc_for_symbol(symbol, period="6mo"):
 def fetch_latest_news():
     try:
         url = f"https://finnhub.io/api/v1/news?category=general&token={Config.FINNHUB_KEY}"
-        resp = requests.get(url, timeout=5).json()
+        resp = http_client.get(url, timeout=5).json()
         news = []
         for n in resp[:10]:
             news.append({
@@ -1,28 +1,30 @@
 # market_snapshot.py
-from flask import Blueprint, jsonify
-from flask_socketio import SocketIO
-import yfinance as yf
+from flask import Blueprint, jsonify, request
+from flask_socketio import join_room, leave_room
+from realtime import socketio, on_client_disconnect, subscription_registry, HOST_ID
+from leader import leader_lock
+from ohlcv_cache import get_history
+from bar_store import yfinance_range_fetcher, yfinance_batch_range_fetcher
+from indicators import IndicatorSet
 import threading
 import time
 
 market_bp = Blueprint("market_bp", __name__)
-socketio = SocketIO()  # This will be initialized in main app
 
 # ------------------ Market Snapshot API ------------------
 @market_bp.route("/api/market_snapshot/<symbol>", methods=["GET"])
 def market_snapshot(symbol):
     symbol = symbol.upper()
     try:
-        data = yf.Ticker(symbol)
-        hist = data.history(period="1d", interval="1m")  # 1 day, 1-min interval
+        hist = get_history(symbol, period="1d", interval="1m")  # 1 day, 1-min interval
         if hist.empty:
             return jsonify({"error": "No data found"}), 404
         
-        last = hist['Close'][-1]
-        open_price = hist['Open'][0]
+        last = hist['Close'].iloc[-1]
+        open_price = hist['Open'].iloc[0]
         high = hist['High'].max()
         low = hist['Low'].min()
-        volume = int(hist['Volume'][-1])
+        volume = int(hist['Volume'].iloc[-1])
         
         # Fake bid/ask for demo
         bid = round(last * 0.995, 2)
@@ -44,25 +46,176 @@ def market_snapshot(symbol):
 
 
 # ------------------ Real-time updates ------------------
-def emit_market_snapshot(symbol="AAPL"):
-    while True:
-        try:
-            data = yf.Ticker(symbol)
-            hist = data.history(period="1d", interval="1m")
-            if not hist.empty:
-                last = hist['Close'][-1]
-                bid = round(last * 0.995, 2)
-                ask = round(last * 1.005, 2)
-                socketio.emit("market_snapshot_update", {
-                    "symbol": symbol,
-                    "last_price": last,
-                    "bid": bid,
-                    "ask": ask
-                })
-        except Exception as e:
-            print("Error fetching market snapshot:", e)
-        time.sleep(5)  # update every 5 seconds
+class LiveBarFeed:
+    """
+    Incremental 1-minute bar feed for one symbol. The first poll loads the
+    day's bars once; later polls fetch only bars since the last closed one.
+    Closed bars are fed one at a time into streaming indicators, so history
+    is never recomputed. The still-forming last bar only updates the price.
+    """
+
+    def __init__(self, symbol, fetcher=yfinance_range_fetcher, indicators=None):
+        self.symbol = symbol
+        self.fetcher = fetcher
+        self.indicators = indicators or IndicatorSet()
+        self.last_closed = None  # timestamp of the last bar fed to the indicators
+
+    def poll(self):
+        if self.last_closed is None:
+            hist = self.fetcher(self.symbol, "1m", period="1d")
+        else:
+            hist = self.fetcher(self.symbol, "1m", start=self.last_closed)
+        return self.apply(hist)
+
+    def apply(self, hist):
+        """
+        Consume a frame of 1-minute bars (from poll() or a batched download)
+        and return the current snapshot, or None if there is no data.
+        """
+        if hist is None or hist.empty:
+            return None
+
+        closed = hist.iloc[:-1]
+        if self.last_closed is not None:
+            closed = closed[closed.index > self.last_closed]
+        for ts, o, h, l, c, v in zip(closed.index, closed["Open"], closed["High"],
+                                     closed["Low"], closed["Close"], closed["Volume"]):
+            if self.last_closed is not None and ts.date() != self.last_closed.date():
+                self.indicators.vwap.reset()  # new session
+            self.indicators.update({"open": o, "high": h, "low": l, "close": c, "volume": v})
+            self.last_closed = ts
+
+        last = float(hist['Close'].iloc[-1])
+        return {
+            "symbol": self.symbol,
+            "last_price": last,
+            "bid": round(last * 0.995, 2),
+            "ask": round(last * 1.005, 2),
+            "indicators": self.indicators.values(),
+        }
+
+
+class MarketBroadcaster:
+    """
+    Pushes market snapshots only for symbols that clients subscribed to.
+
+    Each client joins a "market:<SYMBOL>" room. Every process publishes the
+    symbols its clients watch to a shared registry, and only the process
+    holding the leader lock polls: one batched download for the union of
+    watched symbols per tick, emitting to a room (through the message queue,
+    so it reaches every process) only when the price changed or a client
+    newly joined. Feeds for symbols nobody watches are dropped.
+    """
+
+    def __init__(self, batch_fetcher=yfinance_batch_range_fetcher, interval=5,
+                 registry=None, leader=None, host_id=HOST_ID):
+        self.batch_fetcher = batch_fetcher
+        self.interval = interval
+        self.registry = registry or subscription_registry("market", ttl=max(3 * interval, 15))
+        self.leader = leader or leader_lock("market_snapshot", ttl=max(3 * interval, 15))
+        self.host_id = host_id
+        self.subscribers = {}  # symbol -> set of sids
+        self.joins = {}  # symbol -> subscribe count, bumped on every join
+        self.seen_joins = {}  # (host_id, symbol) -> joins at the last tick (leader only)
+        self.feeds = {}  # symbol -> LiveBarFeed
+        self.last_sent = {}  # symbol -> last emitted price
+        self._lock = threading.Lock()
+
+    def subscribe(self, sid, symbol):
+        with self._lock:
+            self.subscribers.setdefault(symbol, set()).add(sid)
+            self.joins[symbol] = self.joins.get(symbol, 0) + 1
+
+    def unsubscribe(self, sid, symbol):
+        with self._lock:
+            sids = self.subscribers.get(symbol)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self.subscribers[symbol]
+
+    def remove_client(self, sid):
+        with self._lock:
+            for symbol in [s for s, sids in self.subscribers.items() if sid in sids]:
+                self.subscribers[symbol].discard(sid)
+                if not self.subscribers[symbol]:
+                    del self.subscribers[symbol]
+
+    def tick(self):
+        with self._lock:
+            local = {s: self.joins[s] for s in self.subscribers}
+            for symbol in [s for s in self.joins if s not in self.subscribers]:
+                del self.joins[symbol]
+        self.registry.publish(self.host_id, local)
+        if not self.leader.is_leader():
+            self.feeds.clear()
+            self.last_sent.clear()
+            self.seen_joins = {}
+            return
+
+        shared = self.registry.snapshot()
+        for key, joins in shared.items():
+            if self.seen_joins.get(key) != joins:
+                # Someone joined since the last tick: send even if unchanged
+                self.last_sent.pop(key[1], None)
+        self.seen_joins = shared
+        symbols = sorted({symbol for _, symbol in shared})
+        for symbol in [s for s in self.feeds if s not in symbols]:
+            del self.feeds[symbol]
+            self.last_sent.pop(symbol, None)
+        if not symbols:
+            return
+
+        feeds = {s: self.feeds.setdefault(s, LiveBarFeed(s)) for s in symbols}
+        cold = [s for s, feed in feeds.items() if feed.last_closed is None]
+        warm = [s for s, feed in feeds.items() if feed.last_closed is not None]
+        frames = {}
+        if cold:
+            frames.update(self.batch_fetcher(cold, "1m", period="1d"))
+        if warm:
+            start = min(feeds[s].last_closed for s in warm)
+            frames.update(self.batch_fetcher(warm, "1m", start=start))
+
+        for symbol in symbols:
+            snapshot = feeds[symbol].apply(frames.get(symbol))
+            if snapshot is None or self.last_sent.get(symbol) == snapshot["last_price"]:
+                continue
+            self.last_sent[symbol] = snapshot["last_price"]
+            socketio.emit("market_snapshot_update", snapshot, room=f"market:{symbol}")
+
+    def run(self):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print("Error fetching market snapshot:", e)
+            time.sleep(self.interval)
+
+
+market_broadcaster = MarketBroadcaster()
+
+
+@socketio.on("subscribe_market")
+def subscribe_market(data):
+    symbol = (data or {}).get("symbol", "").upper()
+    if not symbol:
+        return
+    join_room(f"market:{symbol}")
+    market_broadcaster.subscribe(request.sid, symbol)
+
+
+@socketio.on("unsubscribe_market")
+def unsubscribe_market(data):
+    symbol = (data or {}).get("symbol", "").upper()
+    if symbol:
+        leave_room(f"market:{symbol}")
+        market_broadcaster.unsubscribe(request.sid, symbol)
+
+
+@on_client_disconnect
+def on_disconnect(sid):
+    market_broadcaster.remove_client(sid)
 
 
 def start_market_thread():
-    threading.Thread(target=emit_market_snapshot, daemon=True).start()
+    threading.Thread(target=market_broadcaster.run, daemon=True).start()
@@ -0,0 +1,141 @@
+# matching_engine.py
+import queue
+import threading
+from concurrent.futures import Future
+
+from order_book import OrderBook
+
+
+class SymbolWorker:
+    """
+    Owns the OrderBook for one symbol. All access to the book goes through
+    this worker's queue, so matching for a symbol is serialized while
+    different symbols proceed independently.
+
+    After each task, changed levels are published as one delta through
+    `on_delta(symbol, delta)` while still on the worker, so deltas go out
+    in sequence order.
+    """
+
+    def __init__(self, symbol, on_delta=None):
+        self.symbol = symbol
+        self.on_delta = on_delta
+        self.book = OrderBook()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=f"matcher-{symbol}", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.queue.put((future, fn, args, kwargs))
+        return future
+
+    def stop(self):
+        self.queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            result = error = None
+            try:
+                result = fn(self.book, *args, **kwargs)
+            except Exception as e:
+                error = e
+            finally:
+                # Whatever fails, the worker keeps running and the caller gets an answer
+                self._publish()
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _publish(self):
+        try:
+            delta = self.book.take_delta()
+            if delta is None or self.on_delta is None:
+                return
+            delta["symbol"] = self.symbol
+            self.on_delta(self.symbol, delta)
+        except Exception as e:
+            print(f"Error publishing order book delta for {self.symbol}:", e)
+
+
+class MatchingEngine:
+    """
+    Registry of per-symbol order books, each driven by its own SymbolWorker.
+
+    Books live in memory only: resting orders do not survive a restart.
+    Callers persist fills as they happen (trade rows plus Order.status), and
+    orders still open when the process starts are expired (see app.py).
+
+    A worker is only started by an order for its symbol; reads for a symbol
+    nobody has traded return an empty book. The blocking calls wait at most
+    `timeout` seconds and then raise concurrent.futures.TimeoutError.
+    """
+
+    def __init__(self, on_delta=None, timeout=None):
+        self.on_delta = on_delta
+        self.timeout = timeout
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def _worker(self, symbol, create=True):
+        symbol = symbol.upper()
+        worker = self._workers.get(symbol)
+        if worker is None and create:
+            with self._lock:
+                worker = self._workers.get(symbol)
+                if worker is None:
+                    worker = SymbolWorker(symbol, on_delta=self.on_delta)
+                    self._workers[symbol] = worker
+        return worker
+
+    def symbols(self):
+        return list(self._workers)
+
+    def submit(self, symbol, fn, *args, **kwargs):
+        """
+        Run fn(book, *args, **kwargs) on the symbol's worker; returns a Future.
+        """
+        return self._worker(symbol).submit(fn, *args, **kwargs)
+
+    def submit_order(self, symbol, side, price, quantity, order_id=None, timestamp=None):
+        """Queue an order for matching; the Future resolves to its list of trades."""
+        return self.submit(symbol, OrderBook.insert_order, side, price, quantity,
+                           order_id=order_id, timestamp=timestamp)
+
+    def insert_order(self, symbol, side, price, quantity, order_id=None, timestamp=None):
+        return self.submit_order(symbol, side, price, quantity, order_id, timestamp).result(self.timeout)
+
+    def cancel_order(self, symbol, order_id):
+        worker = self._worker(symbol, create=False)
+        if worker is None:
+            return None
+        return worker.submit(OrderBook.cancel_order, order_id).result(self.timeout)
+
+    def get_sorted_book(self, symbol, depth=None):
+        """
+        Full snapshot, tagged with the symbol and the seq of the last delta it
+        includes, so subscribers can apply later deltas on top of it.
+        """
+        worker = self._worker(symbol, create=False)
+        if worker is None:
+            snapshot = OrderBook().get_sorted_book(depth)
+        else:
+            snapshot = worker.submit(OrderBook.get_sorted_book, depth).result(self.timeout)
+        snapshot["symbol"] = symbol.upper()
+        return snapshot
+
+    def shutdown(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            worker.thread.join()
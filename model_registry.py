@@ -0,0 +1,133 @@
+# model_registry.py
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import Config
+from utils import train_model
+
+DEFAULT_HPARAMS = {"sequence_length": 60, "units": 50, "epochs": 5, "batch_size": 32}
+
+
+class ModelRegistry:
+    """
+    Cache of trained LSTM models keyed by (symbol, hyperparameters).
+
+    An entry is reused while it was trained on data ending at the same bar
+    and is younger than `ttl` seconds; otherwise the model is retrained.
+    Warm entries live in an in-memory LRU and every trained model is also
+    persisted (Keras weights + pickled MinMaxScaler) so restarts stay warm.
+    """
+
+    def __init__(self, model_dir, ttl=86400, capacity=16):
+        self.model_dir = model_dir
+        self.ttl = ttl
+        self.capacity = capacity
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, symbol, df, **hparams):
+        """
+        Return (model, scaler) for `symbol` trained on `df`, training only if
+        no fresh model exists for the same last bar and hyperparameters.
+        """
+        hparams = {**DEFAULT_HPARAMS, **hparams}
+        key = (symbol.upper(), tuple(sorted(hparams.items())))
+        end_date = str(df["Date"].iloc[-1]) if "Date" in df else str(df.index[-1])
+
+        with self._key_lock(key):
+            entry = self._cache.get(key)
+            if self._fresh(entry, end_date):
+                with self._lock:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                return entry["model"], entry["scaler"]
+
+            entry = self._load(key, end_date)
+            if entry is not None:
+                with self._lock:
+                    self.disk_hits += 1
+            else:
+                model, scaler = train_model(df, **hparams)
+                entry = {"model": model, "scaler": scaler, "end_date": end_date,
+                         "trained_at": time.time()}
+                self._save(key, entry)
+                with self._lock:
+                    self.misses += 1
+
+            self._remember(key, entry)
+            return entry["model"], entry["scaler"]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "cached_models": len(self._cache),
+                "capacity": self.capacity,
+                "ttl_seconds": self.ttl,
+            }
+
+    def _fresh(self, entry, end_date):
+        return (entry is not None and entry["end_date"] == end_date
+                and time.time() - entry["trained_at"] < self.ttl)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def _path(self, key):
+        symbol, hparams = key
+        digest = hashlib.sha1(repr(hparams).encode()).hexdigest()[:12]
+        return os.path.join(self.model_dir, f"{symbol}-{digest}")
+
+    def _save(self, key, entry):
+        path = self._path(key)
+        try:
+            os.makedirs(path, exist_ok=True)
+            entry["model"].save(os.path.join(path, "model.keras"))
+            with open(os.path.join(path, "scaler.pkl"), "wb") as f:
+                pickle.dump(entry["scaler"], f)
+            with open(os.path.join(path, "meta.json"), "w") as f:
+                json.dump({"end_date": entry["end_date"], "trained_at": entry["trained_at"]}, f)
+        except Exception as e:
+            print(f"Error saving model for {key[0]}: {str(e)}")
+
+    def _load(self, key, end_date):
+        path = self._path(key)
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            from tensorflow.keras.models import load_model
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if not self._fresh(meta, end_date):
+                return None
+            with open(os.path.join(path, "scaler.pkl"), "rb") as f:
+                scaler = pickle.load(f)
+            model = load_model(os.path.join(path, "model.keras"))
+            return {"model": model, "scaler": scaler, **meta}
+        except Exception as e:
+            print(f"Error loading model for {key[0]}: {str(e)}")
+            return None
+
+
+model_registry = ModelRegistry(Config.MODEL_DIR, ttl=Config.MODEL_TTL_SECONDS,
+                               capacity=Config.MODEL_CACHE_SIZE)
@@ -35,7 +35,7 @@ class Order(db.Model):
     side = db.Column(db.String(4), nullable=False)
     price = db.Column(db.Float, nullable=False)
     quantity = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(16), default="open")  # open / pending / executed / cancelled
+    status = db.Column(db.String(16), default="open")  # open / pending / executed / cancelled / expired
     timestamp = db.Column(db.DateTime, server_default=db.func.now())
 
     def to_dict(self):
@@ -0,0 +1,76 @@
+# offload.py
+import sys
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+
+
+def async_mode():
+    """'eventlet' or 'gevent' when the process has been monkey-patched, else 'threading'."""
+    # Only look at libraries already imported: patching imports them first
+    if "eventlet" in sys.modules:
+        from eventlet import patcher
+        if patcher.is_monkey_patched("thread"):
+            return "eventlet"
+    if "gevent" in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched("threading"):
+            return "gevent"
+    return "threading"
+
+
+class Offloader:
+    """
+    Keeps CPU-heavy work (training, simulation, plotting) off the request
+    path.
+
+    Under eventlet or gevent, thread() and process() both run fn on a native
+    OS thread: eventlet's tpool (EVENTLET_THREADPOOL_SIZE threads) or
+    gevent's hub threadpool. Only the calling green thread is parked, and
+    Keras, NumPy and Agg rendering release the GIL for most of their work.
+    A ProcessPoolExecutor cannot be driven from a monkey-patched process,
+    because its manager thread and futures turn green.
+
+    On a plain threaded server, thread() calls fn directly and process()
+    sends it to a ProcessPoolExecutor with `processes` workers, started with
+    spawn. There fn and its arguments must be picklable, so fn has to be a
+    top-level function.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def thread(self, fn, *args, **kwargs):
+        mode = async_mode()
+        if mode == "eventlet":
+            from eventlet import tpool
+            return tpool.execute(fn, *args, **kwargs)
+        if mode == "gevent":
+            from gevent import get_hub
+            return get_hub().threadpool.apply(fn, args, kwargs)
+        return fn(*args, **kwargs)
+
+    def process(self, fn, *args, **kwargs):
+        if async_mode() != "threading":
+            return self.thread(fn, *args, **kwargs)
+        return self.pool().submit(fn, *args, **kwargs).result()
+
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+offloader = Offloader(processes=Config.COMPUTE_PROCESSES or None)
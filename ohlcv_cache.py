@@ -0,0 +1,179 @@
+# ohlcv_cache.py
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from config import Config
+
+
+def _is_intraday(interval):
+    return interval.endswith(("m", "h"))
+
+
+def yfinance_fetcher(symbol, period, interval):
+    """
+    Default source: Yahoo Finance via yfinance. Daily bars get a tz-naive
+    index so dates serialize as plain YYYY-MM-DD.
+    """
+    import yfinance as yf
+    df = yf.Ticker(symbol).history(period=period, interval=interval)
+    if not _is_intraday(interval) and getattr(df.index, "tz", None) is not None:
+        df.index = df.index.tz_localize(None)
+    return df
+
+
+def yfinance_batch_fetcher(symbols, period, interval):
+    """
+    Download many tickers in one yf.download call. Returns {symbol: frame}.
+    """
+    import pandas as pd
+    import yfinance as yf
+    df = yf.download(list(symbols), period=period, interval=interval, group_by="ticker",
+                     auto_adjust=True, progress=False, threads=True)
+    frames = {}
+    for symbol in symbols:
+        if isinstance(df.columns, pd.MultiIndex):
+            if symbol not in df.columns.get_level_values(0):
+                continue
+            frame = df[symbol].dropna(how="all")
+        else:
+            frame = df
+        if not _is_intraday(interval) and getattr(frame.index, "tz", None) is not None:
+            frame.index = frame.index.tz_localize(None)
+        frames[symbol] = frame
+    return frames
+
+
+class OHLCVCache:
+    """
+    TTL + LRU cache of OHLCV frames keyed by (symbol, period, interval).
+
+    Concurrent misses for the same key are coalesced: the first caller runs
+    the fetcher and the rest wait on its result. Frames are shared between
+    callers, so treat them as read-only (copy before mutating in place).
+    """
+
+    def __init__(self, fetcher=yfinance_fetcher, batch_fetcher=yfinance_batch_fetcher,
+                 capacity=256, ttl_intraday=5, ttl_daily=300):
+        self.fetcher = fetcher
+        self.batch_fetcher = batch_fetcher
+        self.capacity = capacity
+        self.ttl_intraday = ttl_intraday
+        self.ttl_daily = ttl_daily
+        self._entries = OrderedDict()  # key -> (expires_at, frame)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, symbol, period="1mo", interval="1d"):
+        key = (symbol.upper(), period, interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            df = self.fetcher(key[0], period, interval)
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, df)
+            del self._inflight[key]
+        future.set_result(df)
+        return df
+
+    def get_many(self, symbols, period="1mo", interval="1d"):
+        """
+        {symbol: frame} for many symbols. Cache hits are served locally and
+        all misses are fetched together in one batch_fetcher call; symbols
+        the source has no data for come back as empty frames.
+        """
+        import pandas as pd
+        symbols = [s.upper() for s in symbols]
+        frames = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for symbol in symbols:
+                entry = self._entries.get((symbol, period, interval))
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end((symbol, period, interval))
+                    self.hits += 1
+                    frames[symbol] = entry[1]
+                else:
+                    missing.append(symbol)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = self.batch_fetcher(missing, period, interval)
+            with self._lock:
+                for symbol in missing:
+                    df = fetched.get(symbol)
+                    if df is None:
+                        df = pd.DataFrame()
+                    self._store((symbol, period, interval), df)
+                    frames[symbol] = df
+        return {symbol: frames[symbol] for symbol in symbols}
+
+    def put(self, symbol, period, interval, df):
+        """Seed the cache with a frame obtained elsewhere (e.g. a batched download)."""
+        with self._lock:
+            self._store((symbol.upper(), period, interval), df)
+
+    def _store(self, key, df):
+        ttl = self.ttl_intraday if _is_intraday(key[2]) else self.ttl_daily
+        self._entries[key] = (time.monotonic() + ttl, df)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == symbol.upper()]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+            }
+
+
+ohlcv_cache = OHLCVCache(capacity=Config.OHLCV_CACHE_SIZE,
+                         ttl_intraday=Config.OHLCV_TTL_INTRADAY,
+                         ttl_daily=Config.OHLCV_TTL_DAILY)
+
+
+def get_history(symbol, period="1mo", interval="1d"):
+    """
+    Cached OHLCV history for a symbol. All market data reads go through here.
+    """
+    return ohlcv_cache.get(symbol, period, interval)
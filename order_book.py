@@ -1,4 +1,11 @@
 import math
+import time
+import itertools
+from array import array
+from collections import OrderedDict
+
+RED = True
+BLACK = False
 
 class SegmentTree:
     def __init__(self, data):
@@ -7,7 +14,8 @@ class SegmentTree:
             self.tree = []
             return
         self.n = len(data)
-        self.tree = [0] * (2 * self.n)
+        # Flat float64 storage: 8 bytes per slot instead of a boxed float per slot
+        self.tree = array("d", bytes(16 * self.n))
         for i in range(self.n):
             self.tree[self.n + i] = data[i]
         for i in range(self.n - 1, 0, -1):
@@ -31,18 +39,47 @@ class SegmentTree:
         return res
 
 class RBNode:
-    def __init__(self, key, value, color="red", parent=None):
+    __slots__ = ("key", "value", "color", "parent", "left", "right", "orders")
+
+    def __init__(self, key, value, color=RED, parent=None):
         self.key = key
         self.value = value
         self.color = color
         self.parent = parent
         self.left = None
         self.right = None
+        # FIFO queue of resting orders at this price level, keyed by order id;
+        # created on first use so bare trees don't pay for it
+        self.orders = None
+
+class RestingOrder:
+    __slots__ = ("id", "side", "price", "quantity", "timestamp", "level")
+
+    def __init__(self, order_id, side, price, quantity, timestamp=None):
+        self.id = order_id
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.level = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "side": self.side,
+            "price": self.price,
+            "quantity": self.quantity,
+            "timestamp": self.timestamp,
+        }
 
 class RBTree:
     def __init__(self):
-        self.nil = RBNode(None, None, color="black")
+        self.nil = RBNode(None, None, color=BLACK)
         self.root = self.nil
+        # Cached extreme nodes, so top-of-book is O(1)
+        self.min_node = None
+        self.max_node = None
+        self.size = 0
 
     def insert(self, key, value):
         new_node = RBNode(key, value)
@@ -51,11 +88,11 @@ class RBTree:
 
         parent = None
         current = self.root
-        while current != self.nil:
+        while current is not self.nil:
             parent = current
             if key == current.key:
                 current.value += value
-                return
+                return current
             elif key < current.key:
                 current = current.left
             else:
@@ -69,45 +106,51 @@ class RBTree:
         else:
             parent.right = new_node
 
-        new_node.color = "red"
+        new_node.color = RED
         self._fix_insert(new_node)
+        self.size += 1
+        if self.min_node is None or key < self.min_node.key:
+            self.min_node = new_node
+        if self.max_node is None or key > self.max_node.key:
+            self.max_node = new_node
+        return new_node
 
     def _fix_insert(self, node):
-        while node.parent and node.parent.color == "red":
+        while node.parent and node.parent.color == RED:
             if node.parent == node.parent.parent.left:
                 uncle = node.parent.parent.right
-                if uncle and uncle.color == "red":
-                    node.parent.color = "black"
-                    uncle.color = "black"
-                    node.parent.parent.color = "red"
+                if uncle and uncle.color == RED:
+                    node.parent.color = BLACK
+                    uncle.color = BLACK
+                    node.parent.parent.color = RED
                     node = node.parent.parent
                 else:
                     if node == node.parent.right:
                         node = node.parent
                         self._rotate_left(node)
-                    node.parent.color = "black"
-                    node.parent.parent.color = "red"
+                    node.parent.color = BLACK
+                    node.parent.parent.color = RED
                     self._rotate_right(node.parent.parent)
             else:
                 uncle = node.parent.parent.left
-                if uncle and uncle.color == "red":
-                    node.parent.color = "black"
-                    uncle.color = "black"
-                    node.parent.parent.color = "red"
+                if uncle and uncle.color == RED:
+                    node.parent.color = BLACK
+                    uncle.color = BLACK
+                    node.parent.parent.color = RED
                     node = node.parent.parent
                 else:
                     if node == node.parent.left:
                         node = node.parent
                         self._rotate_right(node)
-                    node.parent.color = "black"
-                    node.parent.parent.color = "red"
+                    node.parent.color = BLACK
+                    node.parent.parent.color = RED
                     self._rotate_left(node.parent.parent)
-        self.root.color = "black"
+        self.root.color = BLACK
 
     def _rotate_left(self, x):
         y = x.right
         x.right = y.left
-        if y.left != self.nil:
+        if y.left is not self.nil:
             y.left.parent = x
         y.parent = x.parent
         if not x.parent:
@@ -122,7 +165,7 @@ class RBTree:
     def _rotate_right(self, x):
         y = x.left
         x.left = y.right
-        if y.right != self.nil:
+        if y.right is not self.nil:
             y.right.parent = x
         y.parent = x.parent
         if not x.parent:
@@ -139,22 +182,142 @@ class RBTree:
             result = []
         if node is None:
             node = self.root
-        if node != self.nil:
+        if node is not self.nil:
             self.inorder(node.left, result)
             result.append((node.key, node.value))
             self.inorder(node.right, result)
         return result
 
+    def minimum(self):
+        return self.min_node
+
+    def maximum(self):
+        return self.max_node
+
+    def successor(self, node):
+        if node.right is not self.nil:
+            node = node.right
+            while node.left is not self.nil:
+                node = node.left
+            return node
+        parent = node.parent
+        while parent is not None and node == parent.right:
+            node = parent
+            parent = parent.parent
+        return parent
+
+    def predecessor(self, node):
+        if node.left is not self.nil:
+            node = node.left
+            while node.right is not self.nil:
+                node = node.right
+            return node
+        parent = node.parent
+        while parent is not None and node == parent.left:
+            node = parent
+            parent = parent.parent
+        return parent
+
     def remove(self, key, quantity):
         node = self._find_node(self.root, key)
-        if node and node != self.nil:
+        if node and node is not self.nil:
             node.value -= quantity
             if node.value <= 0:
-                # full deletion not implemented
-                pass
+                self.delete(node)
+
+    def delete(self, z):
+        if z is self.min_node:
+            self.min_node = self.successor(z)
+        if z is self.max_node:
+            self.max_node = self.predecessor(z)
+
+        y = z
+        y_color = y.color
+        if z.left is self.nil:
+            x = z.right
+            self._transplant(z, z.right)
+        elif z.right is self.nil:
+            x = z.left
+            self._transplant(z, z.left)
+        else:
+            y = z.right
+            while y.left is not self.nil:
+                y = y.left
+            y_color = y.color
+            x = y.right
+            if y.parent == z:
+                x.parent = y
+            else:
+                self._transplant(y, y.right)
+                y.right = z.right
+                y.right.parent = y
+            self._transplant(z, y)
+            y.left = z.left
+            y.left.parent = y
+            y.color = z.color
+        if y_color == BLACK:
+            self._fix_delete(x)
+        self.nil.parent = None
+        z.parent = z.left = z.right = None
+        self.size -= 1
+
+    def _transplant(self, u, v):
+        if u.parent is None:
+            self.root = v
+        elif u == u.parent.left:
+            u.parent.left = v
+        else:
+            u.parent.right = v
+        v.parent = u.parent
+
+    def _fix_delete(self, x):
+        while x != self.root and x.color == BLACK:
+            if x == x.parent.left:
+                w = x.parent.right
+                if w.color == RED:
+                    w.color = BLACK
+                    x.parent.color = RED
+                    self._rotate_left(x.parent)
+                    w = x.parent.right
+                if w.left.color == BLACK and w.right.color == BLACK:
+                    w.color = RED
+                    x = x.parent
+                else:
+                    if w.right.color == BLACK:
+                        w.left.color = BLACK
+                        w.color = RED
+                        self._rotate_right(w)
+                        w = x.parent.right
+                    w.color = x.parent.color
+                    x.parent.color = BLACK
+                    w.right.color = BLACK
+                    self._rotate_left(x.parent)
+                    x = self.root
+            else:
+                w = x.parent.left
+                if w.color == RED:
+                    w.color = BLACK
+                    x.parent.color = RED
+                    self._rotate_right(x.parent)
+                    w = x.parent.left
+                if w.right.color == BLACK and w.left.color == BLACK:
+                    w.color = RED
+                    x = x.parent
+                else:
+                    if w.left.color == BLACK:
+                        w.right.color = BLACK
+                        w.color = RED
+                        self._rotate_left(w)
+                        w = x.parent.left
+                    w.color = x.parent.color
+                    x.parent.color = BLACK
+                    w.left.color = BLACK
+                    self._rotate_right(x.parent)
+                    x = self.root
+        x.color = BLACK
 
     def _find_node(self, node, key):
-        while node != self.nil:
+        while node is not self.nil:
             if key == node.key:
                 return node
             elif key < node.key:
@@ -167,70 +330,153 @@ class OrderBook:
     def __init__(self):
         self.bids = RBTree()
         self.asks = RBTree()
+        self.orders = {}  # order id -> RestingOrder, for O(1) cancel
+        self._ids = itertools.count(1)
+        # Sequence number of the last published delta, and levels touched since
+        self.seq = 0
+        self._dirty = {}  # (side, price) -> level node
+
+    def insert_order(self, side: str, price: float, quantity: float, order_id=None, timestamp=None):
+        side = side.lower()
+        if side not in ("buy", "sell"):
+            raise ValueError(f"Unknown side {side!r}")
+        if price is None or not price > 0 or not quantity > 0:
+            raise ValueError("price and quantity must be positive")
+        if order_id is None:
+            order_id = f"auto-{next(self._ids)}"
+        elif order_id in self.orders:
+            raise ValueError(f"Order {order_id} is already resting in the book")
 
-    def insert_order(self, side: str, price: float, quantity: float):
         trades = []
-        if side.lower() == "buy":
+        if side == "buy":
             while quantity > 0:
-                best_ask = self.get_best_ask()
-                if best_ask and price >= best_ask["price"]:
-                    trade_qty = min(quantity, best_ask["quantity"])
-                    trades.append({
-                        "buy_price": price,
-                        "sell_price": best_ask["price"],
-                        "quantity": trade_qty
-                    })
-                    quantity -= trade_qty
-                    self.remove_quantity("sell", best_ask["price"], trade_qty)
-                else:
+                level = self.asks.minimum()
+                if level is None or price < level.key:
                     break
-            if quantity > 0:
-                self.bids.insert(price, quantity)
+                quantity = self._fill_level(self.asks, level, quantity, trades,
+                                            buy_price=price, buy_order_id=order_id)
         else:  # sell
             while quantity > 0:
-                best_bid = self.get_best_bid()
-                if best_bid and price <= best_bid["price"]:
-                    trade_qty = min(quantity, best_bid["quantity"])
-                    trades.append({
-                        "buy_price": best_bid["price"],
-                        "sell_price": price,
-                        "quantity": trade_qty
-                    })
-                    quantity -= trade_qty
-                    self.remove_quantity("buy", best_bid["price"], trade_qty)
-                else:
+                level = self.bids.maximum()
+                if level is None or price > level.key:
                     break
-            if quantity > 0:
-                self.asks.insert(price, quantity)
+                quantity = self._fill_level(self.bids, level, quantity, trades,
+                                            sell_price=price, sell_order_id=order_id)
+
+        if quantity > 0:
+            self._rest(RestingOrder(order_id, side, price, quantity, timestamp))
         return trades
 
+    def _fill_level(self, tree, level, quantity, trades, **taker):
+        """
+        Fill against a price level's FIFO queue (price-time priority).
+        Returns the taker quantity left over.
+        """
+        while quantity > 0 and level.orders:
+            maker = next(iter(level.orders.values()))
+            trade_qty = min(quantity, maker.quantity)
+            trade = {
+                "buy_price": level.key,
+                "sell_price": level.key,
+                "quantity": trade_qty,
+                "buy_order_id": maker.id,
+                "sell_order_id": maker.id,
+            }
+            trade.update(taker)
+            trades.append(trade)
+
+            quantity -= trade_qty
+            maker.quantity -= trade_qty
+            level.value -= trade_qty
+            trade["maker_order_id"] = maker.id
+            trade["maker_filled"] = maker.quantity <= 0
+            if maker.quantity <= 0:
+                del level.orders[maker.id]
+                del self.orders[maker.id]
+        self._dirty[(maker.side, level.key)] = level
+        if not level.orders:
+            tree.delete(level)
+        return quantity
+
+    def _rest(self, order):
+        tree = self.bids if order.side == "buy" else self.asks
+        level = tree.insert(order.price, order.quantity)
+        if level.orders is None:
+            level.orders = OrderedDict()
+        level.orders[order.id] = order
+        order.level = level
+        self.orders[order.id] = order
+        self._dirty[(order.side, level.key)] = level
+
+    def cancel_order(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+        level = order.level
+        del level.orders[order_id]
+        level.value -= order.quantity
+        self._dirty[(order.side, level.key)] = level
+        if not level.orders:
+            tree = self.bids if order.side == "buy" else self.asks
+            tree.delete(level)
+        order.level = None
+        return order
+
     def remove_quantity(self, side: str, price: float, quantity: float):
-        if side.lower() == "buy":
-            self.bids.remove(price, quantity)
-        else:
-            self.asks.remove(price, quantity)
+        """
+        Take `quantity` off the front of the FIFO queue at `price`.
+        """
+        tree = self.bids if side.lower() == "buy" else self.asks
+        level = tree._find_node(tree.root, price)
+        if level is not None and level.orders:
+            self._fill_level(tree, level, quantity, [])
 
     def get_best_bid(self):
-        bids = self.bids.inorder()
-        if not bids:
+        node = self.bids.maximum()
+        if node is None:
             return None
-        price, qty = max(bids, key=lambda x: x[0])
-        return {"price": price, "quantity": qty}
+        return {"price": node.key, "quantity": node.value}
 
     def get_best_ask(self):
-        asks = self.asks.inorder()
-        if not asks:
+        node = self.asks.minimum()
+        if node is None:
             return None
-        price, qty = min(asks, key=lambda x: x[0])
-        return {"price": price, "quantity": qty}
+        return {"price": node.key, "quantity": node.value}
 
     def get_sorted_book(self, depth: int = None):
-        bids = sorted(self.bids.inorder(), key=lambda x: -x[0])
-        asks = sorted(self.asks.inorder(), key=lambda x: x[0])
-        if depth:
-            bids = bids[:depth]
-            asks = asks[:depth]
+        """
+        Aggregated depth, best price first, read straight off the trees by
+        walking out from the cached best levels: O(depth), not O(levels).
+        """
         return {
-            "bids": [{"price": float(p), "quantity": float(q)} for p, q in bids],
-            "asks": [{"price": float(p), "quantity": float(q)} for p, q in asks],
+            "seq": self.seq,
+            "bids": self._walk(self.bids.maximum(), self.bids.predecessor, depth),
+            "asks": self._walk(self.asks.minimum(), self.asks.successor, depth),
         }
+
+    def _walk(self, node, step, depth):
+        levels = []
+        while node is not None and (not depth or len(levels) < depth):
+            levels.append({"price": float(node.key), "quantity": float(node.value)})
+            node = step(node)
+        return levels
+
+    def take_delta(self):
+        """
+        Collect the levels changed since the last call as one sequence-numbered
+        delta, or None if nothing changed. A quantity of 0 means the level
+        was removed.
+        """
+        if not self._dirty:
+            return None
+        changes = []
+        for (side, price), level in self._dirty.items():
+            if level.orders:
+                changes.append({"side": side, "price": float(price),
+                                "quantity": float(level.value), "action": "update"})
+            else:
+                changes.append({"side": side, "price": float(price),
+                                "quantity": 0.0, "action": "remove"})
+        self._dirty = {}
+        self.seq += 1
+        return {"seq": self.seq, "changes": changes}
@@ -0,0 +1,201 @@
+# order_ingest.py
+import time
+import queue
+import threading
+from collections import deque
+
+from sqlalchemy import func, text
+
+from config import Config
+from models import db, Order, Trade
+
+
+class OrderStatus:
+    """Queue tag for a status change of an existing Order row ({"id", "status"})."""
+
+
+class IdAllocator:
+    """
+    Hands out primary keys before the row is written, so an order can be
+    acknowledged (and matched) by id while its INSERT is still queued.
+
+    On PostgreSQL ids come from the table's serial sequence, reserved
+    `block_size` at a time, so several processes can allocate safely. Other
+    databases fall back to max(id) + a local counter, which is only safe
+    with a single writing process.
+    """
+
+    def __init__(self, model, block_size=100):
+        self.model = model
+        self.block_size = block_size
+        self._ids = deque()
+        self._high = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if not self._ids:
+                self._reserve()
+            return self._ids.popleft()
+
+    def _reserve(self):
+        table = self.model.__tablename__
+        with db.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                ids = conn.execute(
+                    text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :n)"),
+                    {"table": table, "n": self.block_size},
+                ).scalars().all()
+            else:
+                current = conn.execute(db.select(func.max(self.model.id))).scalar() or 0
+                start = max(current, self._high) + 1
+                ids = range(start, start + self.block_size)
+                self._high = start + self.block_size - 1
+        self._ids.extend(ids)
+
+
+class OrderIngestor:
+    """
+    Write-behind pipeline for Order and Trade rows.
+
+    Handlers allocate an id, enqueue the row and return straight away. One
+    writer thread drains the queue and writes a batch every `flush_interval`
+    seconds or `batch_size` rows, whichever comes first: one
+    bulk_insert_mappings per model and a single commit. If the batch fails,
+    its rows are retried one by one, so a single bad row only loses itself.
+
+    The queue is bounded by `max_pending`. add_order raises queue.Full when
+    it is full so the handler can shed load; add_trades never blocks the
+    matching worker that calls it and counts the trades it had to drop.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=0.05, max_pending=10000, id_block=100):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.order_ids = IdAllocator(Order, id_block)
+        self.app = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.orders_written = 0
+        self.trades_written = 0
+        self.batches = 0
+        self.failed_rows = 0
+        self.statuses_written = 0
+        self.dropped_trades = 0
+        self.last_flush_seconds = None
+
+    def start(self, app):
+        self.app = app
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="order-writer", daemon=True)
+            self._thread.start()
+
+    def next_order_id(self):
+        return self.order_ids.next()
+
+    def add_order(self, mapping):
+        """Queue an Order row (a dict of column values including its id)."""
+        self.queue.put_nowait((Order, mapping))
+
+    def add_trades(self, trades, filled=()):
+        """
+        Queue Trade rows for trades reported by the matching engine, and mark
+        the orders in `filled` (ids) executed. Written after any queued
+        insert of those orders, since the queue is FIFO.
+        """
+        rows = [(Trade, {"buy_price": t["buy_price"], "sell_price": t["sell_price"],
+                         "quantity": t["quantity"]}) for t in trades]
+        rows += [(OrderStatus, {"id": order_id, "status": "executed"}) for order_id in filled]
+        for i, row in enumerate(rows):
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                dropped = len(rows) - i
+                with self._lock:
+                    self.dropped_trades += dropped
+                print(f"Order queue full, dropped {dropped} trade / status rows")
+                return
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _flush(self, batch):
+        start = time.monotonic()
+        with self.app.app_context():
+            try:
+                self._write(batch)
+                written = batch
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error writing order batch of {len(batch)} rows, retrying row by row:", e)
+                written = self._write_rows(batch)
+        with self._lock:
+            self.orders_written += sum(1 for model, _ in written if model is Order)
+            self.trades_written += sum(1 for model, _ in written if model is Trade)
+            self.statuses_written += sum(1 for model, _ in written if model is OrderStatus)
+            self.failed_rows += len(batch) - len(written)
+            self.batches += 1
+            self.last_flush_seconds = time.monotonic() - start
+
+    def _write(self, batch):
+        orders = [row for model, row in batch if model is Order]
+        trades = [row for model, row in batch if model is Trade]
+        statuses = [row for model, row in batch if model is OrderStatus]
+        if orders:
+            db.session.bulk_insert_mappings(Order, orders)
+        if trades:
+            db.session.bulk_insert_mappings(Trade, trades)
+        if statuses:
+            db.session.bulk_update_mappings(Order, statuses)
+        db.session.commit()
+
+    def _write_rows(self, batch):
+        written = []
+        for item in batch:
+            try:
+                self._write([item])
+            except Exception as e:
+                db.session.rollback()
+                print(f"Dropping unwritable {item[0].__name__} row {item[1]}:", e)
+            else:
+                written.append(item)
+        return written
+
+    def drain(self):
+        """Block until everything queued so far has been written (or failed)."""
+        self.queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self.queue.qsize(),
+                "orders_written": self.orders_written,
+                "trades_written": self.trades_written,
+                "statuses_written": self.statuses_written,
+                "batches": self.batches,
+                "rows_per_batch": ((self.orders_written + self.trades_written + self.statuses_written) / self.batches
+                                   if self.batches else None),
+                "failed_rows": self.failed_rows,
+                "dropped_trades": self.dropped_trades,
+                "last_flush_seconds": self.last_flush_seconds,
+            }
+
+
+order_ingestor = OrderIngestor(batch_size=Config.ORDER_BATCH_SIZE,
+                               flush_interval=Config.ORDER_FLUSH_MS / 1000.0,
+                               max_pending=Config.ORDER_QUEUE_SIZE,
+                               id_block=Config.ORDER_ID_BLOCK)
@@ -0,0 +1,67 @@
+# prediction_jobs.py
+from config import Config
+from models import buy_or_hold
+from utils import fetch_data, predict_horizons, monte_carlo_simulation
+from model_registry import model_registry
+from bar_store import bar_store
+from offload import offloader
+from jobs import JobQueue
+from realtime import socketio
+
+
+def data_version(symbol):
+    """
+    Timestamp of the symbol's last stored daily bar; a new bar invalidates
+    cached predictions. Only reads the local store: syncing (a full backfill
+    for a new symbol) happens inside the job, not on the request path.
+    """
+    bars = bar_store.read(symbol)
+    return int(bars["ts"][-1]) if len(bars) else None
+
+
+def run_prediction(symbol, progress):
+    """
+    The /api/predict pipeline: fetch, train (or reuse) the LSTM, roll out 7
+    and 50 days, then Monte Carlo around the 7-day price. Keras and NumPy
+    work goes through the offloader.
+    """
+    progress("fetching", 0.05)
+    df = fetch_data(symbol)
+    if df is None or df.empty:
+        raise LookupError(f"No data found for {symbol}")
+
+    progress("training", 0.15)
+    model, scaler = offloader.thread(model_registry.get, symbol, df)
+
+    progress("predicting", 0.75)
+    horizons = offloader.thread(predict_horizons, model, scaler, df, (7, 50))
+    future_7, future_50 = horizons[7], horizons[50]
+
+    progress("simulating", 0.9)
+    predicted_price = future_7[-1]
+    mean_price, lower_bound, upper_bound, _ = offloader.thread(monte_carlo_simulation, predicted_price)
+
+    latest_price = df["Close"].iloc[-1]
+    return {
+        "symbol": symbol,
+        "latest_price": float(latest_price),
+        "prediction_next_7_days": [float(x) for x in future_7.flatten()],
+        "prediction_next_50_days": [float(x) for x in future_50.flatten()],
+        "monte_carlo_mean": float(mean_price),
+        "confidence_interval": {
+            "5_percentile": float(lower_bound),
+            "95_percentile": float(upper_bound)
+        },
+        "decision": buy_or_hold(latest_price, predicted_price),
+        "data_end": str(df["Date"].iloc[-1]),
+    }
+
+
+def notify_job(event, job):
+    name = "prediction_done" if event == "finished" else "prediction_progress"
+    socketio.emit(name, job.to_dict(), room=f"job:{job.id}")
+
+
+prediction_jobs = JobQueue(run_prediction, version=data_version, notify=notify_job,
+                           max_workers=Config.PREDICT_WORKERS, max_pending=Config.PREDICT_MAX_PENDING,
+                           max_age=Config.PREDICT_CACHE_SECONDS)
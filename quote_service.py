@@ -0,0 +1,120 @@
+# quote_service.py
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import Config
+from http_client import http_client
+from ohlcv_cache import get_history
+
+
+def finnhub_quote(symbol):
+    url = f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={Config.FINNHUB_KEY}"
+    resp = http_client.get(url, timeout=5).json()
+    # Finnhub answers unknown symbols with c == 0
+    if resp and resp.get("c"):
+        return float(resp["c"])
+    return None
+
+
+def yfinance_quote(symbol):
+    df = get_history(symbol, period="1d", interval="1m")
+    if not df.empty:
+        return float(df["Close"].iloc[-1])
+    return None
+
+
+class SourceStats:
+    """Exponentially weighted latency and error rate for one quote source."""
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.calls = 0
+
+    def record(self, latency, ok):
+        self.calls += 1
+        self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+
+    def score(self):
+        # Expected time to a good answer; untried sources go first
+        if self.latency is None:
+            return 0.0
+        return self.latency / max(1.0 - self.error_rate, 0.05)
+
+
+class QuoteService:
+    """
+    Last-price lookups with a short-lived cache and hedged requests.
+
+    Sources are tried in order of their observed score. If the first has not
+    answered within `hedge_delay` seconds (or fails), the next one is fired
+    in parallel and the first usable answer wins. Prices younger than
+    `max_age` seconds are served from the cache.
+    """
+
+    def __init__(self, sources, max_age=2.0, hedge_delay=0.3, max_workers=16):
+        self.sources = sources  # name -> fn(symbol) -> float or None
+        self.max_age = max_age
+        self.hedge_delay = hedge_delay
+        self.stats_by_source = {name: SourceStats() for name in sources}
+        self._cache = {}  # symbol -> (fetched_at, price)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quote")
+
+    def _ranked(self):
+        with self._lock:
+            return sorted(self.sources, key=lambda name: self.stats_by_source[name].score())
+
+    def _call(self, name, symbol):
+        start = time.monotonic()
+        try:
+            price = self.sources[name](symbol)
+        except Exception:
+            price = None
+        with self._lock:
+            self.stats_by_source[name].record(time.monotonic() - start, price is not None)
+        return price
+
+    def get_price(self, symbol):
+        symbol = symbol.upper()
+        with self._lock:
+            cached = self._cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < self.max_age:
+            return cached[1]
+
+        order = self._ranked()
+        pending = {self._executor.submit(self._call, order[0], symbol)}
+        next_source = 1
+        while pending:
+            hedge = self.hedge_delay if next_source < len(order) else None
+            done, pending = wait(pending, timeout=hedge, return_when=FIRST_COMPLETED)
+            for future in done:
+                price = future.result()
+                if price is not None:
+                    with self._lock:
+                        self._cache[symbol] = (time.monotonic(), price)
+                    return price
+            if next_source < len(order):
+                pending.add(self._executor.submit(self._call, order[next_source], symbol))
+                next_source += 1
+        return None
+
+    def get_prices(self, symbols):
+        """{symbol: price or None} for many symbols, looked up concurrently."""
+        symbols = [s.upper() for s in symbols]
+        futures = {s: http_client.submit_call(self.get_price, s) for s in dict.fromkeys(symbols)}
+        return {s: futures[s].result() for s in symbols}
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {"calls": s.calls, "latency": s.latency, "error_rate": round(s.error_rate, 4)}
+                for name, s in self.stats_by_source.items()
+            }
+
+
+quote_service = QuoteService({"finnhub": finnhub_quote, "yfinance": yfinance_quote},
+                             max_age=Config.QUOTE_MAX_AGE, hedge_delay=Config.QUOTE_HEDGE_DELAY)
@@ -1,23 +1,166 @@
 # realtime.py
+import json
+import uuid
+import queue
+import threading
+
+import socketio as python_socketio
+from flask import request
 from flask_socketio import SocketIO
-from threading import Thread
-import time
 
-# Create a SocketIO instance
+from config import Config
+from leader import shared_redis_url
+
+# The one SocketIO instance for the app; with SOCKETIO_MESSAGE_QUEUE set,
+# emits from any process reach clients connected to every process
 socketio = SocketIO(cors_allowed_origins="*")
 
-def broadcast_news(news_list):
-    """Broadcast news updates to all connected clients"""
-    socketio.emit("news_update", {"news": news_list})
 
-def start_scheduler(app):
-    """Run background tasks periodically"""
-    def job():
+class LocalPubSubManager(python_socketio.PubSubManager):
+    """
+    In-process stand-in for a message queue ("local://"): SocketIO servers
+    in the same process that share a channel see each other's emits, so
+    several workers can be exercised side by side without a broker.
+    """
+
+    name = "local"
+    _queues = {}  # channel -> list of queue.Queue, one per server
+    _queues_lock = threading.Lock()
+
+    def __init__(self, channel="flask-socketio", write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.queue = queue.Queue()
+        with self._queues_lock:
+            self._queues.setdefault(channel, []).append(self.queue)
+
+    def _publish(self, data):
+        message = json.dumps(data)
+        with self._queues_lock:
+            queues = list(self._queues.get(self.channel, ()))
+        for q in queues:
+            q.put(message)
+
+    def _listen(self):
         while True:
-            with app.app_context():
-                print("Background job running...")
-                # Example: refresh data or run predictions
-            time.sleep(3600)  # every hour
+            yield self.queue.get()
+
+
+def socketio_options(url=None, channel=None):
+    """SocketIO init_app options for the configured message queue (none, local:// or a broker URL)."""
+    url = Config.SOCKETIO_MESSAGE_QUEUE if url is None else url
+    channel = channel or Config.SOCKETIO_CHANNEL
+    if not url:
+        return {}
+    if url.startswith("local://"):
+        return {"client_manager": LocalPubSubManager(channel=channel)}
+    return {"message_queue": url, "channel": channel}
+
+
+def init_socketio(app):
+    from offload import async_mode
+    mode = async_mode()
+    socketio.init_app(app, cors_allowed_origins="*", async_mode=None if mode == "threading" else mode,
+                      **socketio_options())
+
+
+# Socket.IO keeps one handler per event, so modules that track clients
+# register their cleanup here instead of handling "disconnect" themselves
+_disconnect_handlers = []
+
+
+def on_client_disconnect(fn):
+    _disconnect_handlers.append(fn)
+    return fn
+
+
+@socketio.on("disconnect")
+def client_disconnected(*args):
+    for fn in _disconnect_handlers:
+        try:
+            fn(request.sid)
+        except Exception as e:
+            print("Error in disconnect handler:", e)
 
-    Thread(target=job, daemon=True).start()
 
+class LocalSubscriptionRegistry:
+    """
+    Which symbols each process's clients watch, shared between the instances
+    in this process. Values are per-symbol join counters, so a reader can
+    tell when a new client joined a symbol that was already watched.
+    """
+
+    _hosts = {}  # name -> {host_id: {symbol: joins}}
+    _lock = threading.Lock()
+
+    def __init__(self, name, ttl=None):
+        self.name = name
+
+    def publish(self, host_id, joins):
+        with self._lock:
+            hosts = self._hosts.setdefault(self.name, {})
+            if joins:
+                hosts[host_id] = dict(joins)
+            else:
+                hosts.pop(host_id, None)
+
+    def snapshot(self):
+        """{(host_id, symbol): joins} across all processes."""
+        with self._lock:
+            return {(host, symbol): n for host, joins in self._hosts.get(self.name, {}).items()
+                    for symbol, n in joins.items()}
+
+
+class RedisSubscriptionRegistry:
+    """
+    Same as LocalSubscriptionRegistry, across hosts: one Redis hash per
+    process, rewritten on every publish and expiring after `ttl` seconds so
+    dead processes drop out.
+    """
+
+    def __init__(self, name, url, ttl=30):
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = f"subs:{name}:"
+        self.ttl = int(ttl)
+
+    def publish(self, host_id, joins):
+        key = self.prefix + host_id
+        pipe = self.redis.pipeline()
+        pipe.delete(key)
+        if joins:
+            pipe.hset(key, mapping=joins)
+            pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def snapshot(self):
+        result = {}
+        for key in self.redis.scan_iter(match=self.prefix + "*"):
+            host = key[len(self.prefix):]
+            for symbol, n in self.redis.hgetall(key).items():
+                result[(host, symbol)] = int(n)
+        return result
+
+
+def subscription_registry(name, ttl=30):
+    """
+    Registry every process publishes to: Redis when one is configured
+    (LEADER_LOCK_URL, else a redis:// SOCKETIO_MESSAGE_QUEUE), in-process for
+    a single worker. Any other multi-process setup is refused rather than
+    letting each process see only its own clients' subscriptions.
+    """
+    url = shared_redis_url()
+    if url:
+        return RedisSubscriptionRegistry(name, url, ttl)
+    queue_url = Config.SOCKETIO_MESSAGE_QUEUE
+    if Config.WEB_WORKERS > 1 or (queue_url and not queue_url.startswith("local://")):
+        raise RuntimeError(f"Subscriptions to {name} must be shared between processes: "
+                           "set LEADER_LOCK_URL (or SOCKETIO_MESSAGE_QUEUE) to a redis:// URL")
+    return LocalSubscriptionRegistry(name)
+
+
+HOST_ID = uuid.uuid4().hex  # identifies this process in shared registries
+
+
+def broadcast_news(news_list):
+    """Broadcast news updates to all connected clients"""
+    socketio.emit("news_update", {"news": news_list})
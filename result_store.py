@@ -0,0 +1,69 @@
+# result_store.py
+import os
+import json
+import time
+import threading
+
+from config import Config
+from leader import shared_redis_url
+
+
+class FileResultStore:
+    """
+    Latest output of each scheduled job as a JSON file under `root`, so every
+    worker on the host serves what the leader computed. Files are replaced
+    atomically; readers never see a partial write.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, f"{name}.json")
+
+    def put(self, name, value):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"updated_at": time.time(), "value": value}, f)
+        os.replace(tmp, path)
+
+    def get(self, name):
+        """{"updated_at", "value"} or None if the job has not produced it yet."""
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class RedisResultStore:
+    """Same as FileResultStore, in Redis, for workers spread over several hosts."""
+
+    def __init__(self, url, prefix="scheduled:"):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def put(self, name, value):
+        self.redis.set(self.prefix + name, json.dumps({"updated_at": time.time(), "value": value}))
+
+    def get(self, name):
+        try:
+            raw = self.redis.get(self.prefix + name)
+        except Exception as e:
+            print(f"Result store unavailable for {name}:", e)
+            return None
+        return json.loads(raw) if raw else None
+
+
+def result_store():
+    url = shared_redis_url()
+    if url:
+        return RedisResultStore(url)
+    return FileResultStore(Config.SCHEDULER_RESULTS_DIR)
+
+
+# Written by the scheduler's jobs (see scheduler.py), read by the web handlers
+scheduled_results = result_store()
@@ -1,19 +1,31 @@
-from flask import Blueprint, jsonify, request, Response, render_template
+from flask import Blueprint, jsonify, request, Response, render_template, stream_with_context
 from models import db, Order, Trade, SimulationResult, buy_or_hold,User
-from order_book import OrderBook
-from market_data import get_price_for_symbol
-from simulation import monte_carlo_gbm, summarize_final_prices
-from realtime import socketio, broadcast_news
-from gemini_client import ask_gemini
-from utils import fetch_data, train_model, predict_future, monte_carlo_simulation
+from matching_engine import MatchingEngine
+from market_data import get_price_for_symbol, get_prices_for_symbols
+from simulation import simulate_summary
+from realtime import socketio, broadcast_news, on_client_disconnect
+from gemini_client import get_market_summary, stream_market_summary, sse_events
+from model_registry import model_registry
+from order_ingest import order_ingestor
+from event_bus import EventBus, socketio_backlog
+from offload import offloader
+from jobs import JobQueueFull
+from prediction_jobs import prediction_jobs
+from scheduler import compute_signals, compute_bands, scheduler_stats
+from result_store import scheduled_results
+from charts import render_line_chart
+from config import Config
+from ohlcv_cache import get_history
+from bar_store import bar_store
 from flask_login import login_user, logout_user, current_user, login_required 
 from flask import redirect, url_for
+from flask_socketio import emit, join_room
 
-import io
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import yfinance as yf
+import math
+import time
+import queue
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import partial, wraps
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
@@ -22,7 +34,62 @@ from tensorflow.keras.layers import LSTM, Dense
 
 # ✅ Define Blueprint here
 routes_bp = Blueprint("routes", __name__)
-order_book = OrderBook()
+
+
+# Book deltas and trades are coalesced per symbol and sent to subscribers in batches
+event_bus = EventBus(emit=socketio.emit,
+                     snapshot=lambda symbol: matching_engine.get_sorted_book(symbol),
+                     backlog=socketio_backlog(socketio),
+                     window=Config.EVENT_BUS_WINDOW_MS / 1000.0,
+                     max_backlog=Config.EVENT_BUS_MAX_BACKLOG,
+                     max_changes=Config.EVENT_BUS_MAX_CHANGES,
+                     max_trades=Config.EVENT_BUS_MAX_TRADES)
+
+matching_engine = MatchingEngine(on_delta=event_bus.publish_delta, timeout=Config.MATCHING_TIMEOUT)
+
+
+def requires_order_book(view):
+    """503 instead of matching against a book other workers can't see (see ORDER_BOOK_ENABLED)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not Config.ORDER_BOOK_ENABLED:
+            return jsonify({"error": "The order book is disabled on this deployment"}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def book_depth(depth):
+    """Snapshot depth from client input, clamped to 1..ORDER_BOOK_MAX_DEPTH; ValueError if not an integer."""
+    if depth is None:
+        return Config.ORDER_BOOK_MAX_DEPTH
+    try:
+        depth = int(depth)
+    except (TypeError, ValueError):
+        raise ValueError("depth must be an integer")
+    return min(max(depth, 1), Config.ORDER_BOOK_MAX_DEPTH)
+
+
+def filled_orders(trades, order_id=None, quantity=None):
+    """Ids of the orders these trades completed: filled makers, plus the taker if fully filled."""
+    filled = [t["maker_order_id"] for t in trades if t["maker_filled"]]
+    if order_id is not None and sum(t["quantity"] for t in trades) >= quantity - 1e-9:
+        filled.append(order_id)
+    return filled
+
+
+def record_trades(symbol, order_id, quantity, future):
+    """
+    Done-callback for a submitted order: queue its trades and the orders they
+    filled for writing, and publish the trades.
+    """
+    try:
+        trades = future.result()
+    except Exception as e:
+        print("Error matching order:", e)
+        return
+    if trades:
+        order_ingestor.add_trades(trades, filled_orders(trades, order_id, quantity))
+        event_bus.publish_trades(symbol, trades)
 
 @routes_bp.route('/api/signup', methods=['POST'])
 def api_signup():
@@ -116,6 +183,7 @@ def signup():
 
 
 @routes_bp.route("/order", methods=["POST"])
+@requires_order_book
 def place_order():
     data = request.get_json(force=True, silent=True)
     if not data:
@@ -130,55 +198,97 @@ def place_order():
 
     try:
         quantity = float(quantity)
-    except ValueError:
+    except (TypeError, ValueError):
         return jsonify({"error": "quantity must be numeric"}), 400
+    if not quantity > 0:
+        return jsonify({"error": "quantity must be positive"}), 400
 
     price = get_price_for_symbol(symbol)
+    if price is None:
+        return jsonify({"error": f"No price available for {symbol}"}), 422
 
-    # ✅ Insert into database
-    new_order = Order(symbol=symbol, side=side, price=price, quantity=quantity)
-    db.session.add(new_order)
-    db.session.commit()
-
-    # ✅ Match orders (optional)
-    trades_executed = order_book.insert_order(side, price, quantity)
+    # ✅ Queue the row for the batched writer and acknowledge with its id
+    order_id = order_ingestor.next_order_id()
+    try:
+        order_ingestor.add_order({"id": order_id, "symbol": symbol, "side": side,
+                                  "price": price, "quantity": quantity, "status": "open"})
+    except queue.Full:
+        return jsonify({"error": "Order queue is full, retry shortly"}), 503
 
-    # ✅ Rebuild orderbook from DB
-    bids = Order.query.filter_by(symbol=symbol, side="buy").order_by(Order.price.desc()).all()
-    asks = Order.query.filter_by(symbol=symbol, side="sell").order_by(Order.price.asc()).all()
+    # ✅ Match in the background (trades go out as trade_batch, book changes as orderbook_delta)
+    future = matching_engine.submit_order(symbol, side, price, quantity, order_id=order_id)
+    future.add_done_callback(partial(record_trades, symbol, order_id, quantity))
 
-    bids_data = [{"price": o.price, "quantity": o.quantity} for o in bids]
-    asks_data = [{"price": o.price, "quantity": o.quantity} for o in asks]
+    return jsonify({
+        "message": "Order accepted",
+        "order_id": order_id,
+        "status": "accepted",
+        "order": {"symbol": symbol, "side": side, "price": price, "quantity": quantity},
+    }), 202
 
-    # ✅ Emit updates
-    socketio.emit("order_update", {"symbol": symbol, "bids": bids_data, "asks": asks_data})
-    for trade in trades_executed:
-        socketio.emit("trade_update", trade)
 
-    return jsonify({
-        "message": "Order placed successfully",
-        "trades": trades_executed,
-        "remaining_order": {
-            "side": side,
-            "price": price,
-            "quantity": quantity - sum(t["quantity"] for t in trades_executed)
-        }
-    }), 201
+@routes_bp.route("/api/orders/stats", methods=["GET"])
+def order_ingest_stats():
+    return jsonify(order_ingestor.stats())
 
 
    
 
 
 @routes_bp.route("/orderbook/<symbol>", methods=["GET"])
+@requires_order_book
 def get_orderbook(symbol):
-    symbol = symbol.upper()
-    bids = Order.query.filter_by(symbol=symbol, side="buy").order_by(Order.price.desc()).all()
-    asks = Order.query.filter_by(symbol=symbol, side="sell").order_by(Order.price.asc()).all()
+    try:
+        depth = book_depth(request.args.get("depth"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return jsonify(matching_engine.get_sorted_book(symbol, depth))
+    except FutureTimeout:
+        return jsonify({"error": "Order book busy, retry shortly"}), 503
+
+
+@socketio.on("subscribe_orderbook")
+def subscribe_orderbook(data):
+    """
+    Subscribe to the symbol's deltas and trades and get a full snapshot.
+    Clients send this again to resync whenever they see a gap in delta seq
+    numbers.
+    """
+    data = data or {}
+    symbol = data.get("symbol", "").upper()
+    if not symbol:
+        return
+    if not Config.ORDER_BOOK_ENABLED:
+        emit("orderbook_error", {"symbol": symbol, "error": "The order book is disabled on this deployment"})
+        return
+    try:
+        depth = book_depth(data.get("depth"))
+    except ValueError as e:
+        emit("orderbook_error", {"symbol": symbol, "error": str(e)})
+        return
+    event_bus.subscribe(request.sid, symbol)
+    try:
+        emit("orderbook_snapshot", matching_engine.get_sorted_book(symbol, depth))
+    except FutureTimeout:
+        emit("orderbook_error", {"symbol": symbol, "error": "Order book busy, resubscribe shortly"})
+
+
+@socketio.on("unsubscribe_orderbook")
+def unsubscribe_orderbook(data):
+    symbol = (data or {}).get("symbol", "").upper()
+    if symbol:
+        event_bus.unsubscribe(request.sid, symbol)
 
-    return jsonify({
-        "bids": [{"price": o.price, "quantity": o.quantity} for o in bids],
-        "asks": [{"price": o.price, "quantity": o.quantity} for o in asks]
-    })
+
+@on_client_disconnect
+def orderbook_disconnect(sid):
+    event_bus.remove_client(sid)
+
+
+@routes_bp.route("/api/events/stats", methods=["GET"])
+def event_bus_stats():
+    return jsonify(event_bus.stats())
 
 
 @routes_bp.route("/orders", methods=["GET"])
@@ -200,20 +310,43 @@ def get_price(symbol):
     return jsonify({"symbol": symbol, "price": price})
 
 
+@routes_bp.route("/prices", methods=["GET"])
+def get_prices():
+    symbols = [s for s in request.args.get("symbols", "").upper().split(",") if s]
+    if not symbols:
+        return jsonify({"error": "symbols query parameter required"}), 400
+    return jsonify({"prices": get_prices_for_symbols(symbols)})
+
+
 @routes_bp.route("/simulate", methods=["POST"])
 def simulate():
     data = request.get_json(force=True, silent=True) or {}
-    symbol = data.get("symbol", "AAPL").upper()
-    start_price = float(data.get("price", 100.0))
-    sims = int(data.get("simulations", 500))
-    days = int(data.get("days", 30))
-    mu = float(data.get("mu", 0.0005))
-    sigma = float(data.get("sigma", 0.01))
-
-    paths = monte_carlo_gbm(start_price, sims, days, mu, sigma)
-    summary = summarize_final_prices(paths)
-
-    sim = SimulationResult(symbol=symbol, start_price=start_price,
+    try:
+        start_price = float(data.get("price", 100.0))
+        sims = int(data.get("simulations", 500))
+        days = int(data.get("days", 30))
+        mu = float(data.get("mu", 0.0005))
+        sigma = float(data.get("sigma", 0.01))
+        seed = data.get("seed")
+        seed = np.random.SeedSequence().entropy if seed is None else int(seed)
+    except (TypeError, ValueError):
+        return jsonify({"error": "price, simulations, days, mu, sigma and seed must be numeric"}), 400
+    if seed < 0:
+        return jsonify({"error": "seed must be a non-negative integer"}), 400
+    if not all(math.isfinite(v) for v in (start_price, mu, sigma)):
+        return jsonify({"error": "price, mu and sigma must be finite"}), 400
+    if sigma < 0:
+        return jsonify({"error": "sigma must not be negative"}), 400
+    if sims < 1 or days < 1:
+        return jsonify({"error": "simulations and days must be at least 1"}), 400
+    if sims * days > Config.SIMULATION_MAX_STEPS:
+        return jsonify({"error": f"simulations * days must not exceed {Config.SIMULATION_MAX_STEPS}"}), 400
+
+    # Summary from final prices only; sample paths are the first 5 simulations of the same seed.
+    # Offloaded (worker thread or process) so the server keeps serving meanwhile.
+    summary, sample_paths = offloader.process(simulate_summary, start_price, sims, days, mu, sigma, seed)
+
+    sim = SimulationResult(start_price=start_price,
                            simulations=sims, days=days,
                            mean_final=summary["mean_final_price"],
                            median_final=summary["median_final_price"],
@@ -221,23 +354,31 @@ def simulate():
     db.session.add(sim)
     db.session.commit()
 
-    return jsonify({"summary": summary, "sample_paths": [p[:5] for p in paths[:5]], "db_record": sim.to_dict()})
+    return jsonify({"summary": summary, "sample_paths": sample_paths[:, :5].tolist(), "db_record": sim.to_dict()})
 
 
 @routes_bp.route("/news", methods=["GET"])
 def get_ai_news():
     symbol = request.args.get("symbol", "AAPL").upper()
-    prompt = f"Give latest concise market summary for {symbol} stock performance and investor sentiment."
 
     try:
-        ai_news = ask_gemini(prompt)
+        ai_news = get_market_summary(symbol)
         broadcast_news([ai_news])
         return jsonify({"symbol": symbol, "news": ai_news}), 200
     except Exception as e:
         return jsonify({"error": f"Failed to get news: {str(e)}"}), 500
 
 
+@routes_bp.route("/news/stream", methods=["GET"])
+def stream_ai_news():
+    """Same summary as /news, sent as server-sent events while Gemini generates it."""
+    symbol = request.args.get("symbol", "AAPL").upper()
+    return Response(stream_with_context(sse_events(stream_market_summary(symbol))),
+                    mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 @routes_bp.route("/confirm", methods=["POST"])
+@requires_order_book
 def confirm_order():
     data = request.get_json(force=True) or {}
     order_id = data.get("order_id")
@@ -251,20 +392,33 @@ def confirm_order():
         return jsonify({"error": f"Order is {order.status} and cannot be confirmed"}), 400
 
     if action == "confirm":
+        future = matching_engine.submit_order(order.symbol, order.side, order.price, order.quantity,
+                                              order_id=order.id)
+        try:
+            try:
+                trades = future.result(matching_engine.timeout)
+            except FutureTimeout:
+                # Withdraw it if still queued, so a retry can't match the order twice;
+                # once the worker has started on it, it finishes shortly, so wait
+                if future.cancel():
+                    return jsonify({"error": "Matching engine busy, retry shortly"}), 503
+                trades = future.result()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         order.status = "executed"
         db.session.commit()
-
-        trades = order_book.insert_order(order.side, order.price, order.quantity)
-        for t in trades:
-            tt = Trade(buy_price=t["buy_price"], sell_price=t["sell_price"], quantity=t["quantity"])
-            db.session.add(tt)
-        db.session.commit()
+        order_ingestor.add_trades(trades, filled_orders(trades))
+        event_bus.publish_trades(order.symbol, trades)
 
         socketio.emit("order_executed", {"order": order.to_dict(), "trades": trades}, namespace="/realtime")
         return jsonify({"message": "Order executed", "trades": trades})
     else:
         order.status = "cancelled"
         db.session.commit()
+        try:
+            matching_engine.cancel_order(order.symbol, order.id)
+        except FutureTimeout:
+            print(f"Cancel of order {order.id} is still queued on the matching worker")
         socketio.emit("order_cancelled", {"order": order.to_dict()}, namespace="/realtime")
         return jsonify({"message": "Order cancelled"})
 
@@ -273,71 +427,102 @@ def confirm_order():
 def show_graph(symbol):
     symbol = symbol.upper()
     try:
-        data = yf.download(symbol, period="1mo", auto_adjust=False)["Close"]
-
-        plt.figure(figsize=(6, 3))
-        plt.plot(data, label=f"{symbol} Price")
-        plt.title(f"{symbol} Price Chart (1 Month)")
-        plt.xlabel("Date")
-        plt.ylabel("Price (USD)")
-        plt.legend()
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        plt.close()
-        return Response(buf.getvalue(), mimetype="image/png")
+        data = get_history(symbol, period="1mo", interval="1d")["Close"]
+        png = offloader.process(render_line_chart, f"{symbol} Price Chart (1 Month)",
+                                data.index, data.to_numpy(), f"{symbol} Price")
+        return Response(png, mimetype="image/png")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @routes_bp.route("/api/predict", methods=["POST"])
 def predict_stock():
-    try:
-        data = request.get_json()
-        symbol = data.get("symbol", "").upper()
+    """
+    Start (or join) a prediction job for the symbol. Returns the job at once:
+    200 with the result if a prediction for the current data is cached,
+    else 202. Follow it with GET /api/predict/<job_id> or by sending
+    watch_prediction over Socket.IO.
+    """
+    data = request.get_json(silent=True) or {}
+    symbol = data.get("symbol", "").upper()
 
-        if not symbol:
-            return jsonify({"error": "Please provide a stock symbol"}), 400
+    if not symbol:
+        return jsonify({"error": "Please provide a stock symbol"}), 400
 
-        df = fetch_data(symbol)
-        if df is None or df.empty:
-            return jsonify({"error": f"No data found for {symbol}"}), 404
+    try:
+        job = prediction_jobs.submit(symbol)
+    except JobQueueFull as e:
+        return jsonify({"error": f"Too many predictions running, retry shortly ({e})"}), 503
+    return jsonify(job.to_dict()), 200 if job.status == "done" else 202
+
+
+@routes_bp.route("/api/predict/<job_id>", methods=["GET"])
+def prediction_status(job_id):
+    job = prediction_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@routes_bp.route("/api/predict/stats", methods=["GET"])
+def prediction_job_stats():
+    return jsonify(prediction_jobs.stats())
+
+
+@socketio.on("watch_prediction")
+def watch_prediction(data):
+    """Receive prediction_progress / prediction_done for a job; sends its current state first."""
+    job = prediction_jobs.get((data or {}).get("job_id", ""))
+    if job is None:
+        emit("prediction_done", {"job_id": (data or {}).get("job_id"), "status": "failed",
+                                 "error": "Unknown job"})
+        return
+    join_room(f"job:{job.id}")
+    emit("prediction_done" if job.status in ("done", "failed") else "prediction_progress", job.to_dict())
+    
+@routes_bp.route("/api/models/stats", methods=["GET"])
+def model_cache_stats():
+    return jsonify(model_registry.stats())
+
+
+@routes_bp.route("/api/signals", methods=["GET"])
+def get_signals():
+    """SMA crossover signals; for the watchlist, as last computed by the scheduler."""
+    symbols = [s for s in request.args.get("symbols", "").upper().split(",") if s] or Config.WATCHLIST
+    stored = scheduled_results.get("sma_signals") if set(symbols) == set(Config.WATCHLIST) else None
+    if stored is not None:
+        return jsonify({"signals": stored["value"], "updated_at": stored["updated_at"]})
+    try:
+        return jsonify({"signals": compute_signals(symbols), "updated_at": time.time()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        model, scaler = train_model(df)
-
-        latest_price = df["Close"].iloc[-1]
-        future_7 = predict_future(model, scaler, df, 7)
-        future_50 = predict_future(model, scaler, df, 50)
-
-        predicted_price = future_7[-1]
-        mean_price, lower_bound, upper_bound, _ = monte_carlo_simulation(predicted_price)
-        decision = buy_or_hold(latest_price, predicted_price)
-
-        return jsonify({
-            "symbol": symbol,
-            "latest_price": float(latest_price),
-            "prediction_next_7_days": [float(x) for x in future_7.flatten()],
-            "prediction_next_50_days": [float(x) for x in future_50.flatten()],
-            "monte_carlo_mean": float(mean_price),
-            "confidence_interval": {
-                "5_percentile": float(lower_bound),
-                "95_percentile": float(upper_bound)
-            },
-            "decision": decision
-        })
 
+@routes_bp.route("/api/bands/<symbol>", methods=["GET"])
+def get_price_bands(symbol):
+    """30-day Monte Carlo percentile bands; watchlist symbols come precomputed by the scheduler."""
+    symbol = symbol.upper()
+    stored = scheduled_results.get("monte_carlo_bands")
+    if stored is not None and symbol in stored["value"]:
+        return jsonify({**stored["value"][symbol], "updated_at": stored["updated_at"]})
+    try:
+        return jsonify({**compute_bands(symbol), "updated_at": time.time()})
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
+
+
+@routes_bp.route("/api/scheduler/stats", methods=["GET"])
+def scheduled_job_stats():
+    return jsonify(scheduler_stats())
+
+
 @routes_bp.route("/api/historical/<symbol>", methods=["GET"])
 def get_historical(symbol):
-    import yfinance as yf
-    import pandas as pd
-
     symbol = symbol.upper()
     try:
         print(f"Fetching 1-year data for {symbol}...")
-        df = yf.download(symbol, period="1y", interval="1d")
+        df = bar_store.get_history(symbol, period="1y", interval="1d")
 
         if df.empty:
             return jsonify({"error": f"No data found for {symbol}"}), 404
@@ -1,13 +1,254 @@
-from threading import Thread
+# scheduler.py
 import time
-from utils import fetch_data
+import threading
+
+import numpy as np
+import pandas as pd
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from config import Config
+from leader import leader_lock
+from result_store import scheduled_results
+from bar_store import bar_store
+from offload import offloader
+from simulation import price_bands
+from services import fetch_stock_data, analyze_signals
+from market_data import fetch_latest_news
+from realtime import broadcast_news
+from jobs import JobQueueFull
+from prediction_jobs import prediction_jobs
+
+
+def cron_trigger(expr, jitter=None):
+    """CronTrigger from a five-field crontab line in SCHEDULER_TIMEZONE (from_crontab takes no jitter)."""
+    minute, hour, day, month, day_of_week = expr.split()
+    return CronTrigger(minute=minute, hour=hour, day=day, month=month, day_of_week=day_of_week,
+                       timezone=Config.SCHEDULER_TIMEZONE, jitter=jitter)
+
+
+def interval_trigger(seconds, jitter=None):
+    """IntervalTrigger every `seconds`, jittered by a tenth of the interval unless given."""
+    return IntervalTrigger(seconds=seconds, jitter=seconds / 10 if jitter is None else jitter)
+
+
+class JobScheduler:
+    """
+    Declared background jobs on an APScheduler BackgroundScheduler.
+
+    Jobs are registered with @job(name, trigger) and run on `threads`
+    threads, at most `max_instances` copies at a time; runs missed while the
+    previous one was still going are coalesced into one. Every process
+    starts the scheduler, but a job only does its work in the process that
+    holds the leader lock, so several workers (or hosts, with a Redis lock)
+    run it once. A heartbeat renews the lock between runs so leadership
+    stays put.
+
+    stats() has each job's runs, skips, misses, failures and durations.
+    """
+
+    def __init__(self, leader, threads=4, heartbeat=10, misfire_grace_time=300):
+        self.leader = leader
+        self.threads = threads
+        self.heartbeat = heartbeat
+        self.misfire_grace_time = misfire_grace_time
+        self._jobs = {}  # name -> (fn, trigger, max_instances)
+        self._stats = {}  # name -> counters and timings
+        self._lock = threading.Lock()
+        self._leader_lock = threading.Lock()
+        self._leader = False
+        self._scheduler = None
+        self._app = None
+
+    def job(self, name, trigger, max_instances=1):
+        def register(fn):
+            self._jobs[name] = (fn, trigger, max_instances)
+            self._stats[name] = {"runs": 0, "failures": 0, "skipped": 0, "missed": 0,
+                                 "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": None,
+                                 "last_started": None, "last_error": None}
+            return fn
+        return register
+
+    def start(self, app=None):
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            self._app = app
+            scheduler = BackgroundScheduler(
+                executors={"default": ThreadPoolExecutor(self.threads)},
+                job_defaults={"coalesce": True, "misfire_grace_time": self.misfire_grace_time},
+                timezone=Config.SCHEDULER_TIMEZONE)
+            for name, (fn, trigger, max_instances) in self._jobs.items():
+                scheduler.add_job(self.run, trigger, args=(name,), id=name, name=name,
+                                  max_instances=max_instances)
+            scheduler.add_job(self.is_leader, IntervalTrigger(seconds=self.heartbeat), id="leader_heartbeat")
+            scheduler.add_listener(self._missed, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+            scheduler.start()
+            self._scheduler = scheduler
+
+    def shutdown(self):
+        with self._lock:
+            scheduler, self._scheduler = self._scheduler, None
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+            with self._leader_lock:
+                self.leader.release()
+                self._leader = False
+
+    def is_leader(self):
+        # Serialised: two threads trying a file lock at once would lock each other out
+        with self._leader_lock:
+            self._leader = self.leader.is_leader()
+            return self._leader
+
+    def run(self, name):
+        """Run a declared job now if this process is the leader, recording how long it took."""
+        fn = self._jobs[name][0]
+        stats = self._stats[name]
+        if not self.is_leader():
+            with self._lock:
+                stats["skipped"] += 1
+            return
+
+        with self._lock:
+            stats["last_started"] = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            if self._app is not None:
+                with self._app.app_context():
+                    fn()
+            else:
+                fn()
+        except Exception as e:
+            error = str(e)
+            print(f"Scheduled job {name} failed:", e)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            stats["runs"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            stats["last_seconds"] = elapsed
+            stats["last_error"] = error
+            if error is not None:
+                stats["failures"] += 1
+
+    def _missed(self, event):
+        # Skipped by APScheduler: past the grace time, or the previous run still going
+        with self._lock:
+            if event.job_id in self._stats:
+                self._stats[event.job_id]["missed"] += 1
+
+    def stats(self):
+        scheduler = self._scheduler
+        jobs = {}
+        with self._lock:
+            for name, stats in self._stats.items():
+                job = scheduler.get_job(name) if scheduler is not None else None
+                runs = stats["runs"]
+                jobs[name] = {
+                    **stats,
+                    "mean_seconds": stats["total_seconds"] / runs if runs else None,
+                    "next_run": job.next_run_time.isoformat() if job and job.next_run_time else None,
+                }
+        return {"running": scheduler is not None, "leader": self._leader, "jobs": jobs}
+
+
+job_scheduler = JobScheduler(leader_lock("scheduler"), threads=Config.SCHEDULER_THREADS)
+
+
+def compute_signals(symbols):
+    """SMA crossover signals over the last 5 days of 1-minute bars."""
+    return analyze_signals(fetch_stock_data(symbols))
+
+
+def compute_bands(symbol, days=30):
+    """Monte Carlo percentile bands for the next `days` sessions from the stored daily closes."""
+    bar_store.sync(symbol)
+    bars = bar_store.read(symbol)
+    if len(bars) < 3:
+        raise LookupError(f"No data found for {symbol}")
+    closes = np.array(bars["close"])
+    as_of = pd.Timestamp(int(bars["ts"][-1])).strftime("%Y-%m-%d")
+    del bars
+    bands = offloader.process(price_bands, closes, days)
+    return {"symbol": symbol, "as_of": as_of, "days": days, **bands}
+
+
+@job_scheduler.job("backfill_bars", cron_trigger(Config.SCHEDULE_BACKFILL_CRON, Config.SCHEDULE_CRON_JITTER))
+def backfill_bars():
+    """After the close, bring the watchlist's daily bars up to date."""
+    failed = []
+    for symbol in Config.WATCHLIST:
+        try:
+            bar_store.sync(symbol, force=True)
+        except Exception as e:
+            print(f"Error backfilling {symbol}:", e)
+            failed.append(symbol)
+    if failed:
+        raise RuntimeError(f"Backfill failed for {', '.join(failed)}")
+
+
+@job_scheduler.job("retrain_models", cron_trigger(Config.SCHEDULE_RETRAIN_CRON, Config.SCHEDULE_CRON_JITTER))
+def retrain_models():
+    """
+    Predict the watchlist through the prediction job queue: that retrains
+    each LSTM on the new bar (persisted, so other workers load rather than
+    train it) and caches the result for /api/predict.
+    """
+    jobs, failed = [], []
+    for symbol in Config.WATCHLIST:
+        try:
+            jobs.append(prediction_jobs.submit(symbol))
+        except JobQueueFull as e:
+            print(f"Error queueing retraining for {symbol}:", e)
+            failed.append(symbol)
+
+    deadline = time.monotonic() + Config.SCHEDULE_RETRAIN_TIMEOUT
+    for job in jobs:
+        if not job.wait(max(0.0, deadline - time.monotonic())) or job.status != "done":
+            failed.append(job.key)
+    if failed:
+        raise RuntimeError(f"Retraining failed for {', '.join(failed)}")
+
+
+@job_scheduler.job("sma_signals", interval_trigger(Config.SCHEDULE_SIGNALS_SECONDS))
+def precompute_signals():
+    scheduled_results.put("sma_signals", compute_signals(Config.WATCHLIST))
+
+
+@job_scheduler.job("monte_carlo_bands", interval_trigger(Config.SCHEDULE_BANDS_SECONDS))
+def precompute_bands():
+    bands = {}
+    for symbol in Config.WATCHLIST:
+        try:
+            bands[symbol] = compute_bands(symbol)
+        except Exception as e:
+            print(f"Error simulating bands for {symbol}:", e)
+    if not bands:
+        raise RuntimeError("No bands simulated")
+    scheduled_results.put("monte_carlo_bands", bands)
+
+
+@job_scheduler.job("news", interval_trigger(Config.SCHEDULE_NEWS_SECONDS))
+def prefetch_news():
+    """Fetch the latest headlines once for every worker and push them to connected clients."""
+    news = fetch_latest_news()
+    if not news:
+        raise RuntimeError("No news fetched")
+    scheduled_results.put("news", news)
+    broadcast_news(news)
+
 
 def start_scheduler(app):
-    def job():
-        while True:
-            with app.app_context():
-                print("Background job running...")
-                # Example: refresh data or run predictions
-            time.sleep(3600)  # every hour
-
-    Thread(target=job, daemon=True).start()
+    """Start the declared jobs. Call in every process; only the leader runs them."""
+    if Config.SCHEDULER_ENABLED:
+        job_scheduler.start(app)
+
+
+def scheduler_stats():
+    return job_scheduler.stats()
@@ -1,40 +1,35 @@
-import yfinance as yf
 import pandas as pd
+from ohlcv_cache import ohlcv_cache
+from sma_strategy import sma_signals, SIGNAL_LABELS
 
 def fetch_stock_data(symbols=None):
+    """
+    Fetch 5 days of 1-minute bars for all symbols in one batched download.
+    Returns a wide (time x symbol) DataFrame of closes, forward-filled so
+    symbols with slightly different bar timestamps line up.
+    """
     if symbols is None:
         symbols = ["AAPL", "MSFT", "GOOG"]
-    
-    data = {}
-    for sym in symbols:
-        ticker = yf.Ticker(sym)
-        hist = ticker.history(period="5d", interval="1m")
-        if hist.empty:
-            continue
-        last_price = hist["Close"].iloc[-1]
-        data[sym] = {"price": last_price, "history": hist}
-    return data
 
+    frames = ohlcv_cache.get_many(symbols, period="5d", interval="1m")
+    closes = {sym: hist["Close"] for sym, hist in frames.items() if not hist.empty}
+    if not closes:
+        return pd.DataFrame()
+    return pd.concat(closes, axis=1).sort_index().ffill()
 
-def analyze_signals(data, short_window=5, long_window=20):
-    signals = {}
-    for sym, info in data.items():
-        hist = info["history"]["Close"]
-        sma_short = hist.rolling(short_window).mean().iloc[-1]
-        sma_long = hist.rolling(long_window).mean().iloc[-1]
-        price = info["price"]
 
-        if sma_short > sma_long:
-            signal = "BUY"
-        elif sma_short < sma_long:
-            signal = "SELL"
-        else:
-            signal = "HOLD"
+def analyze_signals(closes, short_window=5, long_window=20):
+    """
+    SMA crossover signal for every column of a wide close frame in one pass.
+    """
+    if closes.empty:
+        return {}
 
-        signals[sym] = {
-            "price": round(price, 2),
-            "sma_short": round(sma_short, 2),
-            "sma_long": round(sma_long, 2),
-            "signal": signal
-        }
-    return signals
+    result = sma_signals(closes.to_numpy(), short_window, long_window)
+    table = pd.DataFrame({
+        "price": closes.iloc[-1].round(2),
+        "sma_short": result["sma_short"].round(2),
+        "sma_long": result["sma_long"].round(2),
+        "signal": [SIGNAL_LABELS[int(s)] for s in result["signal"]],
+    }, index=closes.columns)
+    return table.to_dict(orient="index")
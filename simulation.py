@@ -1,27 +1,157 @@
-import random
 import math
+import warnings
 import numpy as np
 
+# Upper bound on normal draws held in memory at once (~64 MB of float64)
+DEFAULT_CHUNK_SIZE = 8_000_000
+
+
+def _normal_sampler(rng, days, sobol):
+    """
+    Return draw(n) -> (n, days) standard normals, pseudo-random or from a
+    scrambled Sobol sequence (mapped through the normal inverse CDF).
+    """
+    if not sobol:
+        return lambda n, dtype: rng.standard_normal((n, days), dtype=dtype)
+
+    from scipy.stats import norm, qmc
+    engine = qmc.Sobol(d=days, scramble=True, seed=rng)
+
+    def draw(n, dtype):
+        with warnings.catch_warnings():
+            # Sobol balance warning for non power-of-two n; chunks rarely are
+            warnings.simplefilter("ignore", UserWarning)
+            u = engine.random(n)
+        return norm.ppf(u).astype(dtype, copy=False)
+    return draw
+
+
+def _log_increments(rng, n_simulations, days, drift, vol, dtype, chunk_size,
+                    antithetic=False, sobol=False):
+    """
+    Yield (start_row, log_increments) blocks of at most ~chunk_size draws.
+    Rows are drawn in order, so a given seed produces the same paths no
+    matter how the work is chunked or which mode consumes it.
+
+    With antithetic=True every draw z fills two adjacent rows, z and -z,
+    halving the number of draws and cancelling odd moments of the sampling
+    error. Blocks hold an even number of rows, so pairs never straddle two
+    blocks and the chunking still does not change the paths.
+    """
+    draw = _normal_sampler(rng, days, sobol)
+    rows = max(1, chunk_size // max(days, 1))
+    if antithetic:
+        rows += rows % 2
+    for start in range(0, n_simulations, rows):
+        n = min(rows, n_simulations - start)
+        if antithetic:
+            half = draw((n + 1) // 2, dtype)
+            z = np.empty((2 * len(half), days), dtype=dtype)
+            z[0::2] = half
+            z[1::2] = -half
+            z = z[:n]
+        else:
+            z = draw(n, dtype)
+        z *= vol
+        z += drift
+        yield start, z
+
+
 def monte_carlo_gbm(initial_price: float, n_simulations: int = 500, days: int = 30,
-                    mu: float = 0.0005, sigma: float = 0.01):
-    sims = []
+                    mu: float = 0.0005, sigma: float = 0.01, seed=None,
+                    dtype=np.float64, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    antithetic: bool = False, sobol: bool = False):
+    """
+    Simulate GBM price paths. Returns an (n_simulations, days + 1) array whose
+    first column is the initial price. `antithetic` and `sobol` are variance
+    reduction options; see _log_increments and _normal_sampler.
+    """
+    rng = np.random.default_rng(seed)
     dt = 1.0
     drift = (mu - 0.5 * sigma * sigma) * dt
-    for _ in range(n_simulations):
-        path = [initial_price]
-        for _ in range(days):
-            z = random.gauss(0, 1)
-            shock = sigma * math.sqrt(dt) * z
-            next_price = path[-1] * math.exp(drift + shock)
-            path.append(next_price)
-        sims.append(path)
-    return sims
+    vol = sigma * math.sqrt(dt)
+
+    paths = np.empty((n_simulations, days + 1), dtype=dtype)
+    paths[:, 0] = initial_price
+    for start, block in _log_increments(rng, n_simulations, days, drift, vol, dtype, chunk_size,
+                                        antithetic, sobol):
+        out = paths[start:start + len(block), 1:]
+        np.cumsum(block, axis=1, out=out)
+        np.exp(out, out=out)
+        out *= initial_price
+    return paths
+
+
+def simulate_final_prices(initial_price: float, n_simulations: int = 500, days: int = 30,
+                          mu: float = 0.0005, sigma: float = 0.01, seed=None,
+                          dtype=np.float64, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          antithetic: bool = False, sobol: bool = False):
+    """
+    Same model as monte_carlo_gbm but only keeps final prices, so memory is
+    bounded by chunk_size rather than n_simulations * days. With the same
+    seed the result equals monte_carlo_gbm(...)[:, -1].
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0
+    drift = (mu - 0.5 * sigma * sigma) * dt
+    vol = sigma * math.sqrt(dt)
+
+    finals = np.empty(n_simulations, dtype=dtype)
+    for start, block in _log_increments(rng, n_simulations, days, drift, vol, dtype, chunk_size,
+                                        antithetic, sobol):
+        out = finals[start:start + len(block)]
+        block.sum(axis=1, out=out)
+        np.exp(out, out=out)
+        out *= initial_price
+    return finals
+
 
 def summarize_final_prices(paths):
-    finals = np.array([p[-1] for p in paths])
+    """
+    Accepts either a 2-D array of paths or a 1-D array of final prices.
+    """
+    finals = np.asarray(paths)
+    if finals.ndim == 2:
+        finals = finals[:, -1]
     return {
         "mean_final_price": float(np.mean(finals)),
         "median_final_price": float(np.median(finals)),
         "5pct": float(np.percentile(finals, 5)),
         "95pct": float(np.percentile(finals, 95)),
     }
+
+
+def simulate_summary(initial_price: float, n_simulations: int = 500, days: int = 30,
+                     mu: float = 0.0005, sigma: float = 0.01, seed=None, n_paths: int = 5):
+    """
+    What /simulate returns: the summary of the final prices plus the first
+    `n_paths` paths drawn with the same seed. Plain arguments and results, so
+    it can run in a worker process.
+    """
+    finals = simulate_final_prices(initial_price, n_simulations, days, mu, sigma, seed=seed)
+    paths = monte_carlo_gbm(initial_price, min(n_simulations, n_paths), days, mu, sigma, seed=seed)
+    return summarize_final_prices(finals), paths
+
+
+def price_bands(closes, days: int = 30, n_simulations: int = 2000, percentiles=(5, 50, 95),
+                lookback: int = 252, seed=None):
+    """
+    Day-by-day percentile bands of GBM paths from the last close, with drift
+    and volatility estimated from the last `lookback` daily log returns.
+    Returns {"mu", "sigma", "bands": {percentile: [price per day]}}; plain
+    arguments and results, so it can run in a worker process.
+    """
+    closes = np.asarray(closes, dtype=np.float64)[-(lookback + 1):]
+    returns = np.diff(np.log(closes))
+    if len(returns) < 2:
+        raise ValueError("need at least three closes to estimate drift and volatility")
+    sigma = float(np.std(returns, ddof=1))
+    mu = float(np.mean(returns)) + 0.5 * sigma * sigma
+
+    paths = monte_carlo_gbm(float(closes[-1]), n_simulations, days, mu, sigma, seed=seed, antithetic=True)
+    levels = np.percentile(paths, percentiles, axis=0)
+    return {
+        "mu": mu,
+        "sigma": sigma,
+        "bands": {str(p): [round(float(x), 4) for x in row] for p, row in zip(percentiles, levels)},
+    }
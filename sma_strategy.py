@@ -1,5 +1,89 @@
+import numpy as np
 import pandas as pd
 
+BUY, HOLD, SELL = 1, 0, -1
+SIGNAL_LABELS = {BUY: "BUY", HOLD: "HOLD", SELL: "SELL"}
+
+
+def sma_signals(closes, short_window=10, long_window=50):
+    """
+    Cross-sectional SMA crossover for a (time x symbol) close matrix.
+
+    Only the trailing long_window + 1 rows are read. Returns a dict of
+    per-symbol arrays:
+      sma_short, sma_long: SMAs at the last bar (NaN if the window is short
+        or contains NaN)
+      signal: BUY / SELL / HOLD codes (short above / below / equal to long;
+        HOLD when undefined)
+      crossover: +1 if the short SMA crossed above the long on the last
+        bar, -1 if it crossed below, else 0
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim == 1:
+        closes = closes[:, np.newaxis]
+    n_bars, n_symbols = closes.shape
+
+    def sma(window, end):
+        if end - window < 0:
+            return np.full(n_symbols, np.nan)
+        return closes[end - window:end].mean(axis=0)
+
+    sma_short = sma(short_window, n_bars)
+    sma_long = sma(long_window, n_bars)
+    signal = np.nan_to_num(np.sign(sma_short - sma_long)).astype(np.int8)
+    previous = np.nan_to_num(np.sign(sma(short_window, n_bars - 1) - sma(long_window, n_bars - 1)))
+    crossover = np.where(signal != previous, signal, 0).astype(np.int8)
+    return {"sma_short": sma_short, "sma_long": sma_long, "signal": signal, "crossover": crossover}
+
+
+class IncrementalSMASignals:
+    """
+    Streaming version of sma_signals: feed one (n_symbols,) bar at a time and
+    the SMAs are maintained from running sums over a ring buffer, O(1) per
+    symbol per bar. Sums are recomputed from the buffer each time it wraps
+    to stop floating-point drift.
+    """
+
+    def __init__(self, n_symbols, short_window=10, long_window=50):
+        self.short_window = short_window
+        self.long_window = long_window
+        self.buffer = np.zeros((long_window, n_symbols))
+        self.pos = 0
+        self.count = 0
+        self.sum_short = np.zeros(n_symbols)
+        self.sum_long = np.zeros(n_symbols)
+        self.signal = np.zeros(n_symbols, dtype=np.int8)
+
+    def update(self, bar):
+        bar = np.asarray(bar, dtype=np.float64)
+        if self.count >= self.long_window:
+            self.sum_long -= self.buffer[self.pos]
+        if self.count >= self.short_window:
+            self.sum_short -= self.buffer[(self.pos - self.short_window) % self.long_window]
+        self.sum_long += bar
+        self.sum_short += bar
+        self.buffer[self.pos] = bar
+        self.pos = (self.pos + 1) % self.long_window
+        self.count += 1
+
+        if self.pos == 0:
+            self.sum_long = self.buffer.sum(axis=0)
+            self.sum_short = self.buffer[-self.short_window:].sum(axis=0)
+
+        previous = self.signal
+        if self.count >= self.long_window:
+            sma_short, sma_long = self.sma()
+            self.signal = np.nan_to_num(np.sign(sma_short - sma_long)).astype(np.int8)
+        crossover = np.where((self.signal != previous) & (self.signal != HOLD), self.signal, 0)
+        return {"signal": self.signal, "crossover": crossover.astype(np.int8)}
+
+    def sma(self):
+        if self.count < self.long_window:
+            nan = np.full(self.sum_long.shape, np.nan)
+            return (self.sum_short / self.short_window if self.count >= self.short_window else nan), nan
+        return self.sum_short / self.short_window, self.sum_long / self.long_window
+
+
 def compute_sma_from_ohlc(ohlc_df, short_window=10, long_window=50):
     """
     ohlc_df: pandas DataFrame with 'Close' column
@@ -8,13 +92,10 @@ def compute_sma_from_ohlc(ohlc_df, short_window=10, long_window=50):
     if ohlc_df is None or len(ohlc_df) < long_window:
         return (None, None, "HOLD (insufficient data)")
 
-    df = ohlc_df.copy()
-    df["SMA_Short"] = df["Close"].rolling(window=short_window).mean()
-    df["SMA_Long"] = df["Close"].rolling(window=long_window).mean()
-
-    latest_short = df["SMA_Short"].iloc[-1]
-    latest_long = df["SMA_Long"].iloc[-1]
-    if latest_short is None or latest_long is None or pd.isna(latest_short) or pd.isna(latest_long):
+    result = sma_signals(ohlc_df["Close"].to_numpy(), short_window, long_window)
+    latest_short = result["sma_short"][0]
+    latest_long = result["sma_long"][0]
+    if pd.isna(latest_short) or pd.isna(latest_long):
         return (None, None, "HOLD (insufficient SMA)")
 
     if latest_short > latest_long:
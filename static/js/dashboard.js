@@ -163,11 +163,10 @@
     } catch (err) { console.warn(err); }
 
     // ---- Order Book & Depth Chart ----
-    try {
-      const ob = await fetch(`/orderbook/${sym}`).then(r => r.json());
-      renderOrderBook(ob);
-      renderDepthChart(ob);
-    } catch (err) { console.warn(err); }
+    subscribeOrderBook(sym);
+
+    // ---- Live Price Push ----
+    subscribeMarket(sym);
 
     // ---- Recent Orders ----
     try {
@@ -184,24 +183,19 @@
     try { await loadChatHistory(); } catch (err) { console.warn("Chat load failed:", err); }
 
     // ---- Prediction ----
+    // Runs as a background job: render now if cached, else when prediction_done arrives
     try {
       const resp = await fetch("/api/predict", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ symbol: sym }),
       });
-      const pred = await resp.json();
-      if (!pred.error) {
-        const lastDate = new Date(priceChart.data.labels[priceChart.data.labels.length - 1]);
-        let futureDates7 = [], futureDates50 = [];
-        for (let i = 1; i <= 7; i++) { let d = new Date(lastDate); d.setDate(d.getDate() + i); futureDates7.push(d.toISOString().split("T")[0]); }
-        for (let i = 1; i <= 50; i++) { let d = new Date(lastDate); d.setDate(d.getDate() + i); futureDates50.push(d.toISOString().split("T")[0]); }
-
-        priceChart.data.labels = priceChart.data.labels.concat(futureDates50);
-        priceChart.data.datasets[1].data = Array(priceChart.data.labels.length - futureDates7.length - 1).fill(null).concat(pred.prediction_next_7_days);
-        priceChart.data.datasets[2].data = Array(priceChart.data.labels.length - futureDates50.length - 1).fill(null).concat(pred.prediction_next_50_days);
-        priceChart.update();
-        signalEl.textContent = pred.decision;
+      const job = await resp.json();
+      if (job.status === "done") renderPrediction(job.result);
+      else if (job.job_id) {
+        predictionJobId = job.job_id;
+        signalEl.textContent = "Predicting…";
+        socket.emit("watch_prediction", { job_id: job.job_id });
       }
     } catch (err) { console.warn(err); }
 
@@ -210,6 +204,35 @@
     fetchMarketSnapshot(sym);
   }
 
+  // ----------------- Prediction -----------------
+  let predictionJobId = null;
+
+  function renderPrediction(pred) {
+    if (pred && !pred.error) {
+      const lastDate = new Date(priceChart.data.labels[priceChart.data.labels.length - 1]);
+      let futureDates7 = [], futureDates50 = [];
+      for (let i = 1; i <= 7; i++) { let d = new Date(lastDate); d.setDate(d.getDate() + i); futureDates7.push(d.toISOString().split("T")[0]); }
+      for (let i = 1; i <= 50; i++) { let d = new Date(lastDate); d.setDate(d.getDate() + i); futureDates50.push(d.toISOString().split("T")[0]); }
+
+      priceChart.data.labels = priceChart.data.labels.concat(futureDates50);
+      priceChart.data.datasets[1].data = Array(priceChart.data.labels.length - futureDates7.length - 1).fill(null).concat(pred.prediction_next_7_days);
+      priceChart.data.datasets[2].data = Array(priceChart.data.labels.length - futureDates50.length - 1).fill(null).concat(pred.prediction_next_50_days);
+      priceChart.update();
+      signalEl.textContent = pred.decision;
+    }
+  }
+
+  socket.on("prediction_progress", job => {
+    if (job.job_id === predictionJobId && job.stage) signalEl.textContent = `Predicting… (${job.stage})`;
+  });
+
+  socket.on("prediction_done", job => {
+    if (job.job_id !== predictionJobId) return;
+    predictionJobId = null;
+    if (job.status === "done") renderPrediction(job.result);
+    else signalEl.textContent = job.error || "Prediction failed";
+  });
+
   // ----------------- Load News -----------------
   async function loadNews() {
     try {
@@ -248,28 +271,38 @@
 
 
 
-  chatForm.addEventListener("submit", async (e) => {
+  // Bot replies stream in over Socket.IO: chat_chunk events are appended
+  // to the reply element as they arrive
+  const pendingReplies = {};
+  let chatSeq = 0;
+
+  chatForm.addEventListener("submit", (e) => {
     e.preventDefault();
     const msg = chatInput.value.trim();
     if (!msg) return;
     addChatMessage("You", msg);
 
-    try {
-      const res = await fetch("/api/chat", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: msg }),
-      });
-      const data = await res.json();
-      if (data.reply) addChatMessage("Bot", data.reply);
-      else if (data.error) addChatMessage("System", data.error);
-    } catch (err) {
-      addChatMessage("System", "Error sending message");
-      console.error(err);
-    }
+    const id = ++chatSeq;
+    addChatMessage("Bot", "");
+    pendingReplies[id] = chatBox.lastElementChild;
+    socket.emit("chat_message", { id, message: msg });
     chatInput.value = "";
   });
 
+  socket.on("chat_chunk", ({ id, text }) => {
+    const el = pendingReplies[id];
+    if (!el) return;
+    el.appendChild(document.createTextNode(text));
+    chatBox.scrollTop = chatBox.scrollHeight;
+  });
+
+  socket.on("chat_done", ({ id }) => { delete pendingReplies[id]; });
+
+  socket.on("chat_error", ({ id, error }) => {
+    delete pendingReplies[id];
+    addChatMessage("System", error || "Error sending message");
+  });
+
   // ----------------- Render Helpers -----------------
   function renderOrderBook(book) {
     bidsList.innerHTML = "";
@@ -288,6 +321,51 @@
     depthChart.update();
   }
 
+  // ----------------- Market Snapshot Subscription -----------------
+  let marketSymbol = null;
+
+  function subscribeMarket(sym) {
+    if (marketSymbol && marketSymbol !== sym) socket.emit("unsubscribe_market", { symbol: marketSymbol });
+    marketSymbol = sym;
+    socket.emit("subscribe_market", { symbol: sym });
+  }
+
+  // ----------------- Order Book Subscription -----------------
+  // Full snapshot on subscribe, then seq-numbered deltas; any gap triggers a resync.
+  // The server merges deltas per window, so one delta covers from_seq..seq.
+  let bookSymbol = null;
+  let bookSeq = null;
+  let pendingDeltas = [];
+  let bookLevels = { buy: new Map(), sell: new Map() };
+
+  function subscribeOrderBook(sym) {
+    if (bookSymbol && bookSymbol !== sym) socket.emit("unsubscribe_orderbook", { symbol: bookSymbol });
+    bookSymbol = sym;
+    bookSeq = null;
+    pendingDeltas = [];
+    socket.emit("subscribe_orderbook", { symbol: sym });
+  }
+
+  function renderBookLevels() {
+    const book = {
+      bids: [...bookLevels.buy].sort((a, b) => b[0] - a[0]).map(([price, quantity]) => ({ price, quantity })),
+      asks: [...bookLevels.sell].sort((a, b) => a[0] - b[0]).map(([price, quantity]) => ({ price, quantity })),
+    };
+    renderOrderBook(book);
+    renderDepthChart(book);
+  }
+
+  function applyDelta(delta) {
+    if (delta.seq <= bookSeq) return;
+    if ((delta.from_seq ?? delta.seq) > bookSeq + 1) { subscribeOrderBook(bookSymbol); return; }
+    delta.changes.forEach(c => {
+      if (c.action === "remove") bookLevels[c.side].delete(c.price);
+      else bookLevels[c.side].set(c.price, c.quantity);
+    });
+    bookSeq = delta.seq;
+    renderBookLevels();
+  }
+
   function renderOrders(orders) {
     tradesList.innerHTML = "";
     orders.slice(-30).reverse().forEach(o => {
@@ -307,7 +385,16 @@
   }
 
   // ----------------- Socket.IO Events -----------------
-  socket.on("connect", () => console.log("Socket connected"));
+  socket.on("connect", () => {
+    console.log("Socket connected");
+    if (bookSymbol) subscribeOrderBook(bookSymbol);
+    if (marketSymbol) subscribeMarket(marketSymbol);
+  });
+
+  socket.on("market_snapshot_update", snap => {
+    if (snap.symbol !== marketSymbol) return;
+    lastPriceEl.textContent = Number(snap.last_price).toFixed(2);
+  });
 
   socket.on("price_update", payload => {
     if (payload.symbol === (symbolInput.value || "AAPL").toUpperCase()) {
@@ -316,8 +403,28 @@
     }
   });
 
-  socket.on("order_update", data => { renderOrderBook(data); renderDepthChart(data); });
-  socket.on("trade_update", trade => { const li = document.createElement("li"); li.textContent = `${trade.quantity} @ ${trade.price}`; tradesList.prepend(li); });
+  socket.on("orderbook_snapshot", snap => {
+    if (snap.symbol !== bookSymbol) return;
+    bookLevels = {
+      buy: new Map(snap.bids.map(l => [l.price, l.quantity])),
+      sell: new Map(snap.asks.map(l => [l.price, l.quantity])),
+    };
+    bookSeq = snap.seq;
+    renderBookLevels();
+    const queued = pendingDeltas;
+    pendingDeltas = [];
+    queued.forEach(applyDelta);
+  });
+  socket.on("orderbook_delta", delta => {
+    if (delta.symbol !== bookSymbol) return;
+    if (bookSeq === null) { pendingDeltas.push(delta); return; }
+    applyDelta(delta);
+  });
+  socket.on("trade_batch", ({ symbol, trades }) => {
+    if (symbol !== bookSymbol) return;
+    trades.forEach(trade => { const li = document.createElement("li"); li.textContent = `${trade.quantity} @ ${trade.sell_price}`; tradesList.prepend(li); });
+    while (tradesList.children.length > 50) tradesList.lastChild.remove();
+  });
 
   socket.on("news_update", payload => {
     newsFeed.innerHTML = "";
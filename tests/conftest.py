@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def serve(handler):
+    """Run a ThreadingHTTPServer for `handler` on a free local port; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Upstream API stand-in: small JSON body, answered at once. /status/<code>
+    # answers with that status and /slow/<seconds> sleeps first; hits counts
+    # requests per (method, path)
+    protocol_version = "HTTP/1.1"
+    hits = None
+
+    def _respond(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        key = (self.command, self.path)
+        self.hits[key] = self.hits.get(key, 0) + 1
+        status = 200
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "status":
+            status = int(parts[1])
+        elif len(parts) == 2 and parts[0] == "slow":
+            time.sleep(float(parts[1]))
+        body = b'{"c": 123.45}'
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # client gave up (read timeout)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Yields (base_url, hits) for a local StubHandler server."""
+    hits = {}
+    server, url = serve(type("Stub", (StubHandler,), {"hits": hits}))
+    yield url, hits
+    server.shutdown()
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    # Gemini stand-in: generateContent returns the whole reply and
+    # streamGenerateContent sends each of `chunks` as an SSE event. A
+    # non-200 `status` is returned as an error body instead
+    protocol_version = "HTTP/1.1"
+    chunks = ()
+    chunk_delay = 0
+    status = 200
+
+    def _payload(self, text):
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.status != 200:
+            self._send_json(self.status, {"error": {"code": self.status, "message": "fake failure"}})
+        elif ":streamGenerateContent" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for text in self.chunks:
+                time.sleep(self.chunk_delay)
+                event = f"data: {json.dumps(self._payload(text))}\r\n\r\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._send_json(200, self._payload("".join(self.chunks)))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_gemini():
+    """
+    Factory for local fake Gemini APIs: fake_gemini(chunks, status=200,
+    chunk_delay=0) returns the base_url to pass as gemini_client's base_url.
+    Servers are shut down after the test.
+    """
+    servers = []
+
+    def start(chunks=(), status=200, chunk_delay=0):
+        handler = type("FakeGemini", (FakeGeminiHandler,),
+                       {"chunks": list(chunks), "status": status, "chunk_delay": chunk_delay})
+        server, url = serve(handler)
+        servers.append(server)
+        return url + "/v1beta"
+    yield start
+    for server in servers:
+        server.shutdown()
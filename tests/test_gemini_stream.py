@@ -0,0 +1,112 @@
+import json
+import uuid
+from functools import partial
+
+import pytest
+from flask import Flask
+
+import gemini_client
+from gemini_client import GeminiError, ResponseCache, generate_content, stream_content, sse_events
+
+CHUNKS = ["The ", "market ", "closed ", "higher."]
+
+
+@pytest.fixture
+def gemini(fake_gemini):
+    return fake_gemini(CHUNKS)
+
+
+@pytest.fixture
+def failing_gemini(fake_gemini):
+    return fake_gemini(status=500)
+
+
+def parse_sse(events):
+    parsed = []
+    for event in events:
+        lines = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+        parsed.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return parsed
+
+
+def test_stream_content_yields_chunks_in_order(gemini):
+    assert list(stream_content("hello", base_url=gemini)) == CHUNKS
+    assert generate_content("hello", base_url=gemini) == "".join(CHUNKS)
+
+
+def test_stream_content_raises_on_error(failing_gemini):
+    with pytest.raises(GeminiError, match="500"):
+        list(stream_content("hello", base_url=failing_gemini))
+
+
+def test_response_cache_sends_the_prompt_as_written():
+    prompts = []
+    cache = ResponseCache(fetcher=lambda prompt, model: prompts.append(prompt) or "reply")
+    prompt = "Line one\n\n    indented   code"
+    assert cache.get(prompt) == "reply"
+    assert cache.get("Line one indented code") == "reply"  # same key once whitespace is collapsed
+    assert prompts == [prompt]
+
+
+def test_stream_gemini_sends_the_prompt_as_written(monkeypatch):
+    prompts = []
+
+    def fake_stream(prompt, model):
+        prompts.append(prompt)
+        yield "reply"
+    monkeypatch.setattr(gemini_client, "stream_content", fake_stream)
+    prompt = f"```\nprint('hi')\n```  {uuid.uuid4()}"
+    assert list(gemini_client.stream_gemini(prompt)) == ["reply"]
+    assert prompts == [prompt]
+
+
+def test_sse_events_end_with_done(gemini):
+    events = parse_sse(sse_events(stream_content("hello", base_url=gemini)))
+    assert events == [("message", {"text": text}) for text in CHUNKS] + [("done", {})]
+
+
+def test_sse_events_end_with_error(failing_gemini):
+    events = parse_sse(sse_events(stream_content("hello", base_url=failing_gemini)))
+    assert len(events) == 1
+    name, data = events[0]
+    assert name == "error" and "500" in data["error"]
+
+
+@pytest.fixture
+def chat_client(monkeypatch):
+    from realtime import socketio, init_socketio
+    import extra_routes  # noqa: F401  registers the chat_message handler
+
+    def use(base_url):
+        monkeypatch.setattr(gemini_client, "stream_content", partial(stream_content, base_url=base_url))
+        app = Flask(__name__)
+        init_socketio(app)
+        return socketio.test_client(app)
+    return use
+
+
+def test_chat_message_streams_chunks_then_done(chat_client, gemini):
+    client = chat_client(gemini)
+    prompt = f"hello {uuid.uuid4()}"  # not in the shared reply cache
+    client.emit("chat_message", {"id": 1, "message": prompt})
+    received = [(e["name"], e["args"][0]) for e in client.get_received()]
+    assert received == ([("chat_chunk", {"id": 1, "text": text}) for text in CHUNKS]
+                        + [("chat_done", {"id": 1, "reply": "".join(CHUNKS)})])
+
+    # The completed reply is cached and comes back as a single chunk
+    client.emit("chat_message", {"id": 2, "message": prompt})
+    received = [(e["name"], e["args"][0]) for e in client.get_received()]
+    assert received == [("chat_chunk", {"id": 2, "text": "".join(CHUNKS)}),
+                        ("chat_done", {"id": 2, "reply": "".join(CHUNKS)})]
+
+
+def test_chat_message_reports_errors(chat_client, failing_gemini):
+    client = chat_client(failing_gemini)
+    client.emit("chat_message", {"id": 3, "message": f"hello {uuid.uuid4()}"})
+    received = client.get_received()
+    assert [e["name"] for e in received] == ["chat_error"]
+    assert received[0]["args"][0]["id"] == 3 and "500" in received[0]["args"][0]["error"]
+
+    client.emit("chat_message", {"id": 4})
+    assert [(e["name"], e["args"][0]) for e in client.get_received()] == \
+        [("chat_error", {"id": 4, "error": "Message is required"})]
@@ -0,0 +1,40 @@
+import pytest
+import requests
+
+from http_client import HttpClient
+
+
+def client():
+    return HttpClient(timeout=(1, 0.2), retries=2, backoff=0)
+
+
+def test_get_is_retried_after_read_timeout(stub_server):
+    url, hits = stub_server
+    with pytest.raises(requests.ConnectionError):
+        client().get(url + "/slow/0.5")
+    assert hits[("GET", "/slow/0.5")] == 3
+
+
+def test_post_is_not_retried_after_read_timeout(stub_server):
+    url, hits = stub_server
+    with pytest.raises(requests.ReadTimeout):
+        client().post(url + "/slow/0.5", json={})
+    assert hits[("POST", "/slow/0.5")] == 1
+
+
+@pytest.mark.parametrize("status, attempts", [(500, 1), (502, 1), (503, 3), (429, 3)])
+def test_post_is_retried_only_when_refused(stub_server, status, attempts):
+    url, hits = stub_server
+    assert client().post(f"{url}/status/{status}", json={}).status_code == status
+    assert hits[("POST", f"/status/{status}")] == attempts
+
+
+def test_get_is_retried_on_server_errors(stub_server):
+    url, hits = stub_server
+    assert client().get(url + "/status/502").status_code == 502
+    assert hits[("GET", "/status/502")] == 3
+
+
+def test_pooled_get(stub_server):
+    url, _ = stub_server
+    assert client().get(url).json() == {"c": 123.45}
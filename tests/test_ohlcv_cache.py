@@ -0,0 +1,123 @@
+import threading
+import time
+import types
+
+import pandas as pd
+import pytest
+
+import ohlcv_cache as cache_module
+from ohlcv_cache import OHLCVCache
+
+
+class FakeFetcher:
+    """Counts calls and returns a one-row frame per symbol; `gate` holds fetches until set."""
+
+    def __init__(self):
+        self.calls = []
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, symbol, period, interval):
+        self.calls.append((symbol, period, interval))
+        self.gate.wait(5)
+        return pd.DataFrame({"Close": [len(self.calls)]})
+
+    def batch(self, symbols, period, interval):
+        self.batches.append(list(symbols))
+        return {s: pd.DataFrame({"Close": [1.0]}) for s in symbols if s != "NODATA"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def fetcher():
+    return FakeFetcher()
+
+
+def make_cache(fetcher, **kwargs):
+    return OHLCVCache(fetcher=fetcher, batch_fetcher=fetcher.batch, **kwargs)
+
+
+def test_entries_expire_after_their_ttl(fetcher, clock):
+    cache = make_cache(fetcher, ttl_intraday=5, ttl_daily=300)
+    first = cache.get("aapl", "1mo", "1d")
+    clock[0] += 299
+    assert cache.get("AAPL", "1mo", "1d") is first
+    clock[0] += 2
+    assert cache.get("AAPL", "1mo", "1d") is not first
+    assert len(fetcher.calls) == 2
+
+    cache.get("AAPL", "1d", "1m")
+    clock[0] += 6  # intraday bars go stale much sooner
+    cache.get("AAPL", "1d", "1m")
+    assert len(fetcher.calls) == 4
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(fetcher, clock):
+    cache = make_cache(fetcher, capacity=2)
+    cache.get("A")
+    cache.get("B")
+    cache.get("A")  # B is now the least recently used
+    cache.get("C")
+    assert cache.stats()["entries"] == 2
+
+    cache.get("A")
+    cache.get("C")
+    assert len(fetcher.calls) == 3
+    cache.get("B")
+    assert [call[0] for call in fetcher.calls] == ["A", "B", "C", "B"]
+
+
+def test_concurrent_misses_share_one_fetch(fetcher):
+    cache = make_cache(fetcher)
+    fetcher.gate.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("AAPL"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    fetcher.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(fetcher.calls) == 1
+    assert len(results) == 8 and all(df is results[0] for df in results)
+    assert cache.stats()["misses"] == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    calls = []
+
+    def failing(symbol, period, interval):
+        calls.append(symbol)
+        raise ConnectionError("upstream down")
+    cache = OHLCVCache(fetcher=failing)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            cache.get("AAPL")
+    assert len(calls) == 2
+
+
+def test_get_many_fetches_only_misses_in_one_batch(fetcher, clock):
+    cache = make_cache(fetcher)
+    cached = cache.get("MSFT")
+    frames = cache.get_many(["aapl", "msft", "nodata", "goog"])
+
+    assert fetcher.batches == [["AAPL", "NODATA", "GOOG"]]
+    assert list(frames) == ["AAPL", "MSFT", "NODATA", "GOOG"]
+    assert frames["MSFT"] is cached
+    assert frames["NODATA"].empty
+
+    # The batch seeded the cache, so the next read is all hits
+    assert cache.get_many(["AAPL", "GOOG", "NODATA"])["AAPL"] is frames["AAPL"]
+    assert len(fetcher.batches) == 1
+    assert cache.stats()["hits"] == 4
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+from flask import Flask
+
+pytest.importorskip("tensorflow")
+
+from models import db, Order, SimulationResult  # noqa: E402
+from routes import routes_bp, matching_engine  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    app.register_blueprint(routes_bp)
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.drop_all()
+
+
+def test_simulate_returns_summary_and_saves_it(client):
+    response = client.post("/simulate", json={"price": 100, "simulations": 50, "days": 10, "seed": 7})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["db_record"]["simulations"] == 50
+    assert len(body["sample_paths"]) == 5
+    assert SimulationResult.query.count() == 1
+
+
+@pytest.mark.parametrize("payload", [
+    {"simulations": 0},
+    {"days": -1},
+    {"simulations": 100_000, "days": 100_000},
+    {"sigma": -0.1},
+    {"price": "nan"},
+    {"mu": "inf"},
+    {"seed": -1},
+    {"days": "thirty"},
+])
+def test_simulate_rejects_bad_parameters(client, payload):
+    response = client.post("/simulate", json=payload)
+    assert response.status_code == 400
+    assert SimulationResult.query.count() == 0
+
+
+def test_orderbook_depth_is_validated_and_clamped(client):
+    assert client.get("/orderbook/TEST?depth=deep").status_code == 400
+    assert client.get("/orderbook/TEST?depth=100000").status_code == 200
+
+
+def test_confirm_timeout_withdraws_the_queued_order(client, monkeypatch):
+    order = Order(symbol="BUSY", side="buy", price=10.0, quantity=1.0, status="pending")
+    db.session.add(order)
+    db.session.commit()
+
+    # Hold the symbol's worker so the confirmed order stays queued behind it
+    release = threading.Event()
+    blocker = matching_engine.submit("BUSY", lambda book: release.wait())
+    monkeypatch.setattr(matching_engine, "timeout", 0.05)
+    try:
+        response = client.post("/confirm", json={"order_id": order.id, "action": "confirm"})
+    finally:
+        release.set()
+    blocker.result(5)
+
+    assert response.status_code == 503
+    assert db.session.get(Order, order.id).status == "pending"
+    assert matching_engine.get_sorted_book("BUSY")["bids"] == []
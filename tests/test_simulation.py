@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from simulation import monte_carlo_gbm, simulate_final_prices, summarize_final_prices, price_bands
+
+S0, MU, SIGMA, DAYS = 100.0, 0.0005, 0.01, 30
+
+
+def lognormal_quantile(p):
+    """Closed-form percentile of the GBM price after DAYS steps (dt = 1)."""
+    m = math.log(S0) + (MU - 0.5 * SIGMA ** 2) * DAYS
+    return math.exp(m + SIGMA * math.sqrt(DAYS) * norm.ppf(p / 100))
+
+
+@pytest.mark.parametrize("options", [{}, {"antithetic": True}, {"sobol": True}])
+def test_final_price_percentiles_match_lognormal(options):
+    finals = simulate_final_prices(S0, 20000, DAYS, MU, SIGMA, seed=42, **options)
+    for p in (5, 50, 95):
+        assert np.percentile(finals, p) == pytest.approx(lognormal_quantile(p), rel=0.005)
+    expected_mean = S0 * math.exp(MU * DAYS)
+    assert np.mean(finals) == pytest.approx(expected_mean, rel=0.002)
+
+
+@pytest.mark.parametrize("options", [{}, {"antithetic": True}])
+def test_seed_gives_same_paths_however_chunked(options):
+    default = monte_carlo_gbm(S0, 1001, DAYS, MU, SIGMA, seed=7, **options)
+    chunked = monte_carlo_gbm(S0, 1001, DAYS, MU, SIGMA, seed=7, chunk_size=300, **options)
+    np.testing.assert_allclose(chunked, default)
+    finals = simulate_final_prices(S0, 1001, DAYS, MU, SIGMA, seed=7, chunk_size=300, **options)
+    np.testing.assert_allclose(finals, default[:, -1])
+
+
+def test_summary_is_seeded():
+    paths = monte_carlo_gbm(S0, 500, DAYS, MU, SIGMA, seed=3)
+    assert summarize_final_prices(paths) == summarize_final_prices(paths[:, -1])
+    assert summarize_final_prices(simulate_final_prices(S0, 500, DAYS, MU, SIGMA, seed=3)) == \
+        summarize_final_prices(paths)
+
+
+def test_price_bands_recover_drift_and_volatility():
+    closes = S0 * np.exp(np.cumsum(np.random.default_rng(1).normal(MU - 0.5 * SIGMA ** 2, SIGMA, 2000)))
+    bands = price_bands(closes, days=DAYS, n_simulations=20000, lookback=2000, seed=0)
+    assert bands["sigma"] == pytest.approx(SIGMA, rel=0.05)
+    low, mid, high = (bands["bands"][p] for p in ("5", "50", "95"))
+    assert len(mid) == DAYS + 1 and low[0] == mid[0] == high[0] == pytest.approx(closes[-1])
+    assert all(lo <= m <= hi for lo, m, hi in zip(low, mid, high))
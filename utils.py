@@ -79,22 +79,24 @@
 
 
 # utils.py
-import yfinance as yf
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
+from simulation import simulate_final_prices
+from bar_store import bar_store
 
 # ------------------- DATA FETCHING -------------------
 
 def fetch_data(symbol, period="2y"):
     """
-    Fetch historical daily stock data from Yahoo Finance.
-    Returns a pandas DataFrame.
+    Historical daily stock data for the last `period`, read from the local
+    bar store (see bar_store.py), which first syncs any new bars.
+    Returns a pandas DataFrame, or None if there is no data.
     """
     try:
-        df = yf.download(symbol, period=period, interval="1d", progress=False)
+        df = bar_store.get_history(symbol, period=period, interval="1d")
         if df.empty:
             return None
         df = df.reset_index()
@@ -107,7 +109,7 @@ def fetch_data(symbol, period="2y"):
 
 # ------------------- LSTM MODEL TRAINING -------------------
 
-def train_model(df):
+def train_model(df, sequence_length=60, units=50, epochs=5, batch_size=32):
     """
     Train a simple LSTM model on the 'Close' prices.
     Returns the trained model and the scaler.
@@ -118,7 +120,6 @@ def train_model(df):
 
     # Prepare sequences for LSTM
     X, y = [], []
-    sequence_length = 60
     for i in range(sequence_length, len(scaled_data)):
         X.append(scaled_data[i-sequence_length:i, 0])
         y.append(scaled_data[i, 0])
@@ -128,50 +129,84 @@ def train_model(df):
 
     # Build LSTM model
     model = Sequential()
-    model.add(LSTM(50, return_sequences=True, input_shape=(X.shape[1], 1)))
-    model.add(LSTM(50))
+    model.add(LSTM(units, return_sequences=True, input_shape=(X.shape[1], 1)))
+    model.add(LSTM(units))
     model.add(Dense(1))
     model.compile(optimizer="adam", loss="mean_squared_error")
 
     # Train model
-    model.fit(X, y, epochs=5, batch_size=32, verbose=0)
+    model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=0)
 
     return model, scaler
 
 # ------------------- FUTURE PRICE PREDICTION -------------------
 
-def predict_future(model, scaler, df, days=7):
+def rollout(model, windows, days):
     """
-    Predict future prices for the next 'days' days.
+    Autoregressive rollout for a batch of scaled input windows of shape
+    (batch, sequence_length). Returns scaled predictions (batch, days).
+    Each step is one direct forward pass for the whole batch, writing into a
+    preallocated buffer that the input window slides along.
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    batch, sequence_length = windows.shape
+    buffer = np.empty((batch, sequence_length + days), dtype=np.float32)
+    buffer[:, :sequence_length] = windows
+
+    for t in range(days):
+        x_input = buffer[:, t:t + sequence_length, np.newaxis]
+        pred = model(x_input, training=False)
+        buffer[:, sequence_length + t] = np.asarray(pred)[:, 0]
+
+    return buffer[:, sequence_length:]
+
+
+def predict_horizons(model, scaler, df, horizons=(7,), sequence_length=60):
+    """
+    Predict several horizons from one rollout of the longest one; shorter
+    horizons are prefixes of it. Returns {days: prices}.
     """
     close_prices = df['Close'].values.reshape(-1, 1)
     scaled_data = scaler.transform(close_prices)
 
-    last_60 = scaled_data[-60:]
-    future_scaled = []
+    future_scaled = rollout(model, scaled_data[-sequence_length:].reshape(1, -1), max(horizons))
+    future_prices = scaler.inverse_transform(future_scaled.reshape(-1, 1)).flatten()
+    return {days: future_prices[:days] for days in horizons}
 
-    for _ in range(days):
-        x_input = np.reshape(last_60, (1, 60, 1))
-        pred = model.predict(x_input, verbose=0)[0, 0]
-        future_scaled.append(pred)
-        last_60 = np.append(last_60[1:], [[pred]], axis=0)
 
-    future_prices = scaler.inverse_transform(np.array(future_scaled).reshape(-1, 1)).flatten()
-    return future_prices
+def predict_future(model, scaler, df, days=7):
+    """
+    Predict future prices for the next 'days' days.
+    """
+    return predict_horizons(model, scaler, df, (days,))[days]
+
+
+def predict_future_batch(model, scalers, dfs, days=7, sequence_length=60):
+    """
+    Predict the next 'days' days for several symbols that share one model,
+    running a single forward pass per step for all of them.
+    """
+    windows = np.stack([
+        scaler.transform(df['Close'].values.reshape(-1, 1))[-sequence_length:, 0]
+        for scaler, df in zip(scalers, dfs)
+    ])
+    future_scaled = rollout(model, windows, days)
+    return [
+        scaler.inverse_transform(row.reshape(-1, 1)).flatten()
+        for scaler, row in zip(scalers, future_scaled)
+    ]
 
 # ------------------- MONTE CARLO SIMULATION -------------------
 
-def monte_carlo_simulation(start_price, sims=1000, days=30, mu=0.0005, sigma=0.01):
+def monte_carlo_simulation(start_price, sims=1000, days=30, mu=0.0005, sigma=0.01,
+                           seed=None, antithetic=True, sobol=False):
     """
     Monte Carlo simulation of stock prices using Geometric Brownian Motion.
+    Runs on the shared engine in simulation.py (antithetic by default).
     Returns mean, 5% and 95% percentile prices.
     """
-    final_prices = []
-    for _ in range(sims):
-        price = start_price
-        for _ in range(days):
-            price = price * np.exp((mu - 0.5 * sigma**2) + sigma * np.random.normal())
-        final_prices.append(price)
+    final_prices = simulate_final_prices(start_price, sims, days, mu, sigma, seed=seed,
+                                         antithetic=antithetic, sobol=sobol)
 
     mean_price = np.mean(final_prices)
     lower_bound = np.percentile(final_prices, 5)
@@ -0,0 +1,36 @@
+# wsgi.py
+"""
+Production entry point.
+
+    python wsgi.py                           # one eventlet/gevent server on HOST:PORT
+    gunicorn -c gunicorn.conf.py wsgi:app    # WEB_WORKERS worker processes
+
+Monkey-patching has to happen before anything imports socket or threading,
+so ASYNC_MODE and OFFLOAD_THREADS are read from the process environment
+here rather than from .env. More than one worker needs a shared
+SOCKETIO_MESSAGE_QUEUE and sticky sessions at the load balancer, and
+ORDER_BOOK_ENABLED=0: the order book keeps its books in process memory.
+"""
+import os
+
+ASYNC_MODE = os.getenv("ASYNC_MODE", "eventlet")
+# eventlet sizes its native thread pool (tpool) from this variable on import
+os.environ.setdefault("EVENTLET_THREADPOOL_SIZE", os.getenv("OFFLOAD_THREADS", "20"))
+
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+from config import Config  # noqa: E402
+from app import create_app  # noqa: E402
+from realtime import socketio  # noqa: E402
+from scheduler import start_scheduler  # noqa: E402
+
+app = create_app()
+start_scheduler(app)
+
+if __name__ == "__main__":
+    socketio.run(app, host=Config.HOST, port=Config.PORT)